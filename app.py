@@ -14,7 +14,7 @@ st.markdown("Your tool for house color visualization and palette building.")
 
 st.markdown("---")
 
-col1, col2 = st.columns(2)
+col1, col2, col3 = st.columns(3)
 
 with col1:
     st.subheader("\U0001f3a8 Color Visualizer")
@@ -24,5 +24,9 @@ with col2:
     st.subheader("\U0001f308 Palette Builder")
     st.write("Browse paint brand colors, build custom palettes, and get color suggestions.")
 
+with col3:
+    st.subheader("\U0001f3e1 Scheme Explorer")
+    st.write("Find the best way to assign a saved palette's colors to the body, trim, roof, door and more.")
+
 st.markdown("---")
 st.caption("Use the sidebar to navigate between pages.")
@@ -0,0 +1,342 @@
+"""Columnar binary paint catalog — streaming ingestion and memory-mapped reads.
+
+A store is one file: an 8-byte magic, a little-endian u64 header length,
+a JSON header, then 64-byte-aligned column arrays described by the
+header. Rows are grouped by brand. Strings live in blobs indexed by
+offset arrays, so opening a store maps it without parsing anything.
+
+Build one from vendor CSV / ASE swatch files and the bundled JSON brands:
+
+    python -m lib.catalog_store data/paint_brands/*.json vendor.csv \\
+        --out data/catalog.bin
+"""
+
+import argparse
+import csv
+import io
+import json
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from lib.color_utils import rgb_to_hex, rgb_to_lab, lab_to_rgb
+
+MAGIC = b"HCCAT\x00\x01\x00"
+_ALIGN = 64
+
+# name -> dtype; shapes come from the header
+COLUMNS = {
+    "rgb": "|u1",
+    "lab": "<f4",
+    "brand": "<u2",
+    "name_off": "<i8",
+    "name_blob": "|u1",
+    "code_off": "<i8",
+    "code_blob": "|u1",
+    "search_off": "<i8",
+    "search_blob": "|u1",
+}
+
+
+# ── Readers: each yields (brand, name, code, (r, g, b)) rows ──
+
+def _parse_hex(value: str) -> tuple[int, int, int] | None:
+    h = value.strip().lstrip("#")
+    if len(h) == 3:
+        h = "".join(ch * 2 for ch in h)
+    if len(h) != 6:
+        return None
+    try:
+        return int(h[0:2], 16), int(h[2:4], 16), int(h[4:6], 16)
+    except ValueError:
+        return None
+
+
+def iter_json(path: Path):
+    """Rows from a brand JSON file in the data/paint_brands format."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    brand = data["brand"]
+    for c in data["colors"]:
+        yield brand, c.get("name", ""), c.get("code", ""), _parse_hex(c.get("hex", ""))
+
+
+def iter_csv(path: Path, brand: str | None = None):
+    """Rows from a vendor CSV with a header row.
+
+    Recognized columns (case-insensitive): brand, name, code, and either
+    hex or r/g/b. A missing brand column falls back to *brand*.
+    """
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        header = [h.strip().lower() for h in next(reader, [])]
+        col = {h: i for i, h in enumerate(header)}
+
+        def get(row, key):
+            i = col.get(key)
+            return row[i].strip() if i is not None and i < len(row) else ""
+
+        for row in reader:
+            if "hex" in col:
+                rgb = _parse_hex(get(row, "hex"))
+            else:
+                try:
+                    rgb = tuple(int(float(get(row, k))) for k in ("r", "g", "b"))
+                except ValueError:
+                    rgb = None
+                if rgb is not None and not all(0 <= v <= 255 for v in rgb):
+                    rgb = None
+            yield (get(row, "brand") or brand, get(row, "name"),
+                   get(row, "code"), rgb)
+
+
+def iter_ase(path: Path, brand: str | None = None):
+    """Rows from an Adobe Swatch Exchange (.ase) file, read block by block."""
+    with open(path, "rb") as f:
+        if f.read(4) != b"ASEF":
+            raise ValueError(f"{path} is not an ASE file")
+        _, _, n_blocks = struct.unpack(">HHI", f.read(8))
+        for _ in range(n_blocks):
+            block_type, length = struct.unpack(">HI", f.read(6))
+            payload = f.read(length)
+            if block_type != 0x0001:
+                continue  # group start / end
+            n_chars = struct.unpack_from(">H", payload, 0)[0]
+            name = payload[2:2 + n_chars * 2].decode("utf-16-be").rstrip("\x00")
+            pos = 2 + n_chars * 2
+            model = payload[pos:pos + 4].decode("ascii").strip()
+            pos += 4
+            rgb = None
+            if model == "RGB":
+                vals = struct.unpack_from(">3f", payload, pos)
+                rgb = tuple(round(v * 255) for v in vals)
+            elif model == "CMYK":
+                c, m, y, k = struct.unpack_from(">4f", payload, pos)
+                rgb = tuple(round(255 * (1 - v) * (1 - k)) for v in (c, m, y))
+            elif model == "LAB":
+                lightness, a, b = struct.unpack_from(">3f", payload, pos)
+                rgb = tuple(int(v) for v in np.rint(
+                    lab_to_rgb(np.array([lightness * 100, a, b]))))
+            elif model == "Gray":
+                g = round(struct.unpack_from(">f", payload, pos)[0] * 255)
+                rgb = (g, g, g)
+            if rgb is not None:
+                rgb = tuple(min(255, max(0, v)) for v in rgb)
+            yield brand, name, "", rgb
+
+
+def iter_source(path: Path, brand: str | None = None):
+    """Dispatch to the reader for *path*'s extension.
+
+    CSV and ASE rows without a brand use *brand*, else the file name.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".json":
+        return iter_json(path)
+    default = brand or path.stem.replace("_", " ").title()
+    if suffix == ".csv":
+        return iter_csv(path, default)
+    if suffix == ".ase":
+        return iter_ase(path, default)
+    raise ValueError(f"Unsupported catalog file: {path}")
+
+
+# ── Writing ──
+
+def write(f, rows, stats: dict | None = None):
+    """Normalize, deduplicate and pack *rows* into the binary file *f*.
+
+    Names are whitespace-collapsed, rows without a brand, name or valid
+    color are dropped, and duplicates (same brand and code, or same brand
+    and name when there is no code) keep the first occurrence.
+    """
+    if stats is None:
+        stats = {}
+    stats.setdefault("invalid", 0)
+    stats.setdefault("duplicates", 0)
+    brand_ids: dict[str, int] = {}
+    buckets: list[tuple[bytearray, list, list]] = []
+    seen = set()
+    for brand, name, code, rgb in rows:
+        brand = " ".join((brand or "").split())
+        name = " ".join((name or "").split())
+        code = (code or "").strip()
+        if not brand or not name or rgb is None:
+            stats["invalid"] += 1
+            continue
+        key = (brand.lower(), code.lower() or name.lower())
+        if key in seen:
+            stats["duplicates"] += 1
+            continue
+        seen.add(key)
+        if brand not in brand_ids:
+            brand_ids[brand] = len(buckets)
+            buckets.append((bytearray(), [], []))
+        rgb_buf, names, codes = buckets[brand_ids[brand]]
+        rgb_buf.extend(rgb)
+        names.append(name)
+        codes.append(code)
+
+    brands = list(brand_ids)
+    counts = [len(b[1]) for b in buckets]
+    names = [n for b in buckets for n in b[1]]
+    codes = [c for b in buckets for c in b[2]]
+    rgb = np.frombuffer(b"".join(b[0] for b in buckets), dtype=np.uint8).reshape(-1, 3)
+
+    columns = {
+        "rgb": rgb,
+        "lab": rgb_to_lab(rgb).astype(np.float32).reshape(-1, 3),
+        "brand": np.repeat(np.arange(len(brands), dtype=np.uint16), counts),
+    }
+    for prefix, strings in (("name", names), ("code", codes),
+                            ("search", [n.lower() + "\n" for n in names])):
+        encoded = [s.encode("utf-8") for s in strings]
+        off = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=off[1:])
+        columns[f"{prefix}_off"] = off
+        columns[f"{prefix}_blob"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+    header = {
+        "count": len(names),
+        "brands": brands,
+        "brand_offsets": [0] + np.cumsum(counts).tolist(),
+        "columns": {},
+    }
+    # Column offsets depend on the header length: grow the reserved length
+    # until the header fits, then pad it with spaces (valid JSON whitespace)
+    header_len = 0
+    while True:
+        pos = len(MAGIC) + 8 + header_len
+        for name, arr in columns.items():
+            pos += -pos % _ALIGN
+            header["columns"][name] = {"shape": list(arr.shape), "offset": pos}
+            pos += arr.nbytes
+        header_bytes = json.dumps(header).encode("utf-8")
+        if len(header_bytes) <= header_len:
+            header_bytes = header_bytes.ljust(header_len)
+            break
+        header_len = len(header_bytes)
+
+    f.write(MAGIC)
+    f.write(struct.pack("<Q", len(header_bytes)))
+    f.write(header_bytes)
+    pos = len(MAGIC) + 8 + len(header_bytes)
+    for name, arr in columns.items():
+        offset = header["columns"][name]["offset"]
+        f.write(b"\x00" * (offset - pos))
+        f.write(np.ascontiguousarray(arr, dtype=COLUMNS[name]).tobytes())
+        pos = offset + arr.nbytes
+
+
+def encode(rows, stats: dict | None = None) -> bytes:
+    """Return store bytes for *rows* (see write)."""
+    out = io.BytesIO()
+    write(out, rows, stats)
+    return out.getvalue()
+
+
+def write_store(path: Path, rows, stats: dict | None = None):
+    """Atomically write a store built from *rows* to *path*."""
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        write(f, rows, stats)
+    tmp.replace(path)
+
+
+# ── Reading ──
+
+class ColorTable:
+    """Read-only sequence of color dicts decoded lazily from a store."""
+
+    def __init__(self, cols: dict, brands: list[str]):
+        self._cols = cols
+        self._brands = brands
+
+    def __len__(self):
+        return len(self._cols["brand"])
+
+    def _string(self, prefix: str, i: int) -> str:
+        off = self._cols[f"{prefix}_off"]
+        return self._cols[f"{prefix}_blob"][off[i]:off[i + 1]].tobytes().decode("utf-8")
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        r, g, b = (int(v) for v in self._cols["rgb"][i])
+        return {
+            "name": self._string("name", i),
+            "code": self._string("code", i),
+            "hex": rgb_to_hex(r, g, b),
+            "brand": self._brands[self._cols["brand"][i]],
+        }
+
+
+def from_buffer(buf) -> dict:
+    """Wrap store bytes (or an mmap) as a catalog dict without copying.
+
+    Keys: ``brands``, ``offsets`` (brand *i* owns rows
+    ``offsets[i]:offsets[i + 1]``), ``rgb``, ``lab``, ``search_off``,
+    ``search_blob`` and ``colors`` (a ColorTable).
+    """
+    if bytes(buf[:len(MAGIC)]) != MAGIC:
+        raise ValueError("Not a HouseColors catalog store")
+    (header_len,) = struct.unpack_from("<Q", buf, len(MAGIC))
+    start = len(MAGIC) + 8
+    header = json.loads(bytes(buf[start:start + header_len]))
+    cols = {}
+    for name, dtype in COLUMNS.items():
+        spec = header["columns"][name]
+        count = int(np.prod(spec["shape"]))
+        cols[name] = np.frombuffer(buf, dtype=dtype, count=count,
+                                   offset=spec["offset"]).reshape(spec["shape"])
+    return {
+        "brands": header["brands"],
+        "offsets": np.array(header["brand_offsets"], dtype=np.int64),
+        "rgb": cols["rgb"],
+        "lab": cols["lab"],
+        "search_off": cols["search_off"],
+        "search_blob": cols["search_blob"],
+        "colors": ColorTable(cols, header["brands"]),
+    }
+
+
+def open_store(path: Path) -> dict:
+    """Memory-map the store at *path* (pages are read on demand)."""
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return from_buffer(mm)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Build a HouseColors catalog store from vendor files.")
+    parser.add_argument("sources", nargs="+", type=Path,
+                        help="JSON, CSV or ASE files, ingested in order")
+    parser.add_argument("--brand", help="brand for files that do not name one")
+    parser.add_argument("--out", type=Path, required=True, help="store path")
+    args = parser.parse_args(argv)
+
+    def rows():
+        for src in args.sources:
+            yield from iter_source(src, args.brand)
+
+    stats = {}
+    write_store(args.out, rows(), stats)
+    store = open_store(args.out)
+    print(f"Wrote {len(store['colors'])} colors from {len(store['brands'])} "
+          f"brands to {args.out} (skipped {stats['invalid']} invalid, "
+          f"{stats['duplicates']} duplicates)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,18 @@
 
 import math
 
+import numpy as np
+
+# sRGB (D65) <-> CIE XYZ
+_RGB_TO_XYZ = np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041],
+])
+_XYZ_TO_RGB = np.linalg.inv(_RGB_TO_XYZ)
+_WHITE = np.array([0.95047, 1.0, 1.08883])
+_EPS = (6 / 29) ** 3
+
 
 def hex_to_rgb(hex_str: str) -> tuple[int, int, int]:
     """'#RRGGBB' -> (R, G, B)."""
@@ -14,6 +26,46 @@ def rgb_to_hex(r: int, g: int, b: int) -> str:
     return f"#{r:02x}{g:02x}{b:02x}"
 
 
+def hex_to_rgb_array(hex_list: list[str]) -> np.ndarray:
+    """['#RRGGBB', ...] -> (N, 3) uint8 array."""
+    return np.array([hex_to_rgb(h) for h in hex_list], dtype=np.uint8).reshape(-1, 3)
+
+
+def rgb_array_to_hex(arr: np.ndarray) -> list[str]:
+    """(..., 3) RGB array -> flat list of '#rrggbb' strings."""
+    flat = np.clip(np.rint(arr), 0, 255).astype(np.uint8).reshape(-1, 3)
+    return [rgb_to_hex(int(r), int(g), int(b)) for r, g, b in flat]
+
+
+def relative_luminance(rgb: np.ndarray) -> np.ndarray:
+    """(..., 3) sRGB in 0-255 -> (...) WCAG relative luminance in 0-1."""
+    c = np.asarray(rgb, dtype=np.float64) / 255.0
+    lin = np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+    return lin @ _RGB_TO_XYZ[1]
+
+
+def rgb_to_lab(rgb: np.ndarray) -> np.ndarray:
+    """(..., 3) sRGB in 0-255 -> (..., 3) CIE Lab (D65)."""
+    c = np.asarray(rgb, dtype=np.float64) / 255.0
+    lin = np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+    t = (lin @ _RGB_TO_XYZ.T) / _WHITE
+    f = np.where(t > _EPS, np.cbrt(t), t / (3 * (6 / 29) ** 2) + 4 / 29)
+    fx, fy, fz = f[..., 0], f[..., 1], f[..., 2]
+    return np.stack([116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)], axis=-1)
+
+
+def lab_to_rgb(lab: np.ndarray) -> np.ndarray:
+    """(..., 3) CIE Lab -> (..., 3) sRGB floats, clipped to 0-255."""
+    lab = np.asarray(lab, dtype=np.float64)
+    fy = (lab[..., 0] + 16) / 116
+    f = np.stack([fy + lab[..., 1] / 500, fy, fy - lab[..., 2] / 200], axis=-1)
+    t = np.where(f > 6 / 29, f ** 3, 3 * (6 / 29) ** 2 * (f - 4 / 29))
+    lin = np.clip((t * _WHITE) @ _XYZ_TO_RGB.T, 0, 1)
+    c = np.where(lin <= 0.0031308, lin * 12.92,
+                 1.055 * lin ** (1 / 2.4) - 0.055)
+    return np.clip(c * 255, 0, 255)
+
+
 def color_distance(c1: tuple, c2: tuple) -> float:
     """Euclidean distance in RGB space."""
     return math.sqrt(sum((a - b) ** 2 for a, b in zip(c1, c2)))
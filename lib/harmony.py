@@ -0,0 +1,74 @@
+"""Color harmonies by true hue rotation in CIE LCh, snapped to real paints.
+
+Every palette color is processed at once as an (N, 3) Lab array; each
+suggestion is then matched to the nearest paint of every brand.
+"""
+
+import numpy as np
+
+from lib.color_utils import hex_to_rgb_array, rgb_to_lab, lab_to_rgb, rgb_array_to_hex
+from lib.paint_db import nearest_per_brand
+
+# Hue offsets in degrees around the LCh hue circle
+HARMONIES = {
+    "Complementary": (180,),
+    "Analogous": (-30, 30),
+    "Split-complementary": (150, 210),
+    "Triadic": (120, 240),
+    "Tetradic": (90, 180, 270),
+}
+MONOCHROME = "Monochrome"
+# Lightness offsets (L*) for the monochrome ramp
+MONOCHROME_STEPS = (-30, -15, 15, 30)
+
+HARMONY_KINDS = list(HARMONIES) + [MONOCHROME]
+
+
+def rotate_hue(lab: np.ndarray, degrees) -> np.ndarray:
+    """(N, 3) Lab -> (N, K, 3) Lab with hue rotated by each of K offsets."""
+    lab = np.asarray(lab, dtype=np.float64)
+    chroma = np.hypot(lab[:, 1], lab[:, 2])[:, None]
+    hue = np.arctan2(lab[:, 2], lab[:, 1])[:, None] + np.radians(degrees)[None, :]
+    lightness = np.broadcast_to(lab[:, :1], hue.shape)
+    return np.stack([lightness, chroma * np.cos(hue), chroma * np.sin(hue)], axis=-1)
+
+
+def lightness_ramp(lab: np.ndarray, steps) -> np.ndarray:
+    """(N, 3) Lab -> (N, K, 3) Lab with L* shifted by each of K steps."""
+    lab = np.asarray(lab, dtype=np.float64)
+    out = np.repeat(lab[:, None, :], len(steps), axis=1)
+    out[..., 0] = np.clip(out[..., 0] + np.asarray(steps, dtype=np.float64), 0, 100)
+    return out
+
+
+def harmony_rgb(hex_list: list[str], kind: str) -> np.ndarray:
+    """Return (N, K, 3) sRGB suggestions of *kind* for every palette color."""
+    lab = rgb_to_lab(hex_to_rgb_array(hex_list))
+    if kind == MONOCHROME:
+        shifted = lightness_ramp(lab, MONOCHROME_STEPS)
+    else:
+        shifted = rotate_hue(lab, HARMONIES[kind])
+    return np.rint(lab_to_rgb(shifted))
+
+
+def suggest(hex_list: list[str], kind: str, catalog: dict) -> list[list[dict]]:
+    """Harmony suggestions for every palette color, snapped to catalog paints.
+
+    Returns one list per palette color, each holding one dict per
+    suggestion: ``{"hex": ..., "matches": [...]}`` where *matches* has the
+    closest paint of every catalog brand (with a Lab ``distance``).
+    """
+    if not hex_list:
+        return []
+    rgb = harmony_rgb(hex_list, kind)
+    n, k = rgb.shape[:2]
+    idx, dist = nearest_per_brand(rgb_to_lab(rgb.reshape(-1, 3)), catalog)
+    hexes = rgb_array_to_hex(rgb)
+    flat = []
+    for m, shex in enumerate(hexes):
+        matches = [
+            {**catalog["colors"][i], "distance": round(float(d), 2)}
+            for i, d in zip(idx[m], dist[m]) if i >= 0
+        ]
+        flat.append({"hex": shex, "matches": matches})
+    return [flat[i * k:(i + 1) * k] for i in range(n)]
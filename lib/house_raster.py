@@ -0,0 +1,211 @@
+"""Raster thumbnails of the house template — numpy only, no SVG renderer.
+
+The shapes below mirror ``house_svg()`` in paint order. They are
+rasterized once per thumbnail size into per-paint coverage masks, so
+recoloring is a single matrix product of the masks with a color LUT and a
+whole gallery renders in one batch.
+"""
+
+import functools
+import io
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+from lib.color_utils import hex_to_rgb
+from lib.house_svg import SECTIONS, DEFAULT_COLORS
+
+VIEW_W, VIEW_H = 600, 450
+THUMB_WIDTH = 160
+SUPERSAMPLE = 4
+CACHE_SIZE = 1024
+
+_STROKE = "#333333"
+
+# (kind, geometry, fill, stroke, stroke_width) — fill/stroke are a section
+# name, a fixed hex color or None. Rounded corners (rx) are ignored; they
+# are sub-pixel at thumbnail sizes.
+_SHAPES = [
+    ("polygon", ((50, 180), (300, 40), (550, 180)), "roof", _STROKE, 2),
+    ("rect", (80, 180, 440, 230), "body", _STROKE, 2),
+    ("rect", (80, 176, 440, 8), "trim", None, 0),
+    ("rect", (80, 402, 440, 8), "trim", None, 0),
+    ("rect", (260, 290, 60, 120), "door", _STROKE, 2),
+    ("circle", (310, 355, 4), "#c0a000", None, 0),
+    ("rect", (130, 230, 70, 60), "windows", "trim", 4),
+    ("line", (165, 230, 165, 290), None, "trim", 2),
+    ("line", (130, 260, 200, 260), None, "trim", 2),
+    ("rect", (380, 230, 70, 60), "windows", "trim", 4),
+    ("line", (415, 230, 415, 290), None, "trim", 2),
+    ("line", (380, 260, 450, 260), None, "trim", 2),
+    ("rect", (114, 228, 16, 64), "shutters", _STROKE, 1),
+    ("rect", (200, 228, 16, 64), "shutters", _STROKE, 1),
+    ("rect", (364, 228, 16, 64), "shutters", _STROKE, 1),
+    ("rect", (450, 228, 16, 64), "shutters", _STROKE, 1),
+    ("rect", (400, 330, 90, 80), "garage", _STROKE, 2),
+    ("line", (400, 350, 490, 350), None, _STROKE, 1),
+    ("line", (400, 370, 490, 370), None, _STROKE, 1),
+    ("line", (400, 390, 490, 390), None, _STROKE, 1),
+    ("rect", (0, 410, VIEW_W, 40), "#5a8f29", None, 0),
+]
+
+# Label 0 is the background, then the sections, then fixed template colors
+_PAINTS = ["background"] + SECTIONS + sorted({
+    p for _, _, fill, stroke, _ in _SHAPES for p in (fill, stroke)
+    if p is not None and p not in SECTIONS
+})
+_LABELS = {p: i for i, p in enumerate(_PAINTS)}
+
+
+def _in_rect(X, Y, x, y, w, h):
+    return (X >= x) & (X < x + w) & (Y >= y) & (Y < y + h)
+
+
+def _near_segment(X, Y, x1, y1, x2, y2, half):
+    dx, dy = x2 - x1, y2 - y1
+    t = np.clip(((X - x1) * dx + (Y - y1) * dy) / (dx * dx + dy * dy), 0, 1)
+    return (X - x1 - t * dx) ** 2 + (Y - y1 - t * dy) ** 2 <= half * half
+
+
+def _in_polygon(X, Y, pts):
+    """Even-odd point-in-polygon test over the whole grid."""
+    inside = np.zeros(X.shape, dtype=bool)
+    for (x1, y1), (x2, y2) in zip(pts, pts[1:] + pts[:1]):
+        if y1 == y2:
+            continue
+        crosses = (Y >= min(y1, y2)) & (Y < max(y1, y2))
+        x_at = x1 + (Y - y1) * (x2 - x1) / (y2 - y1)
+        inside ^= crosses & (X < x_at)
+    return inside
+
+
+def _fill_mask(kind, geom, X, Y):
+    if kind == "rect":
+        return _in_rect(X, Y, *geom)
+    if kind == "circle":
+        cx, cy, r = geom
+        return (X - cx) ** 2 + (Y - cy) ** 2 <= r * r
+    if kind == "polygon":
+        return _in_polygon(X, Y, list(geom))
+    raise ValueError(f"Shape kind {kind!r} has no fill")
+
+
+def _stroke_mask(kind, geom, sw, X, Y):
+    half = sw / 2
+    if kind == "rect":
+        x, y, w, h = geom
+        outer = _in_rect(X, Y, x - half, y - half, w + sw, h + sw)
+        return outer & ~_in_rect(X, Y, x + half, y + half, w - sw, h - sw)
+    if kind == "line":
+        return _near_segment(X, Y, *geom, half)
+    if kind == "polygon":
+        pts = list(geom)
+        mask = np.zeros(X.shape, dtype=bool)
+        for (x1, y1), (x2, y2) in zip(pts, pts[1:] + pts[:1]):
+            mask |= _near_segment(X, Y, x1, y1, x2, y2, half)
+        return mask
+    raise ValueError(f"Shape kind {kind!r} has no stroke")
+
+
+@functools.lru_cache(maxsize=8)
+def _coverage(width: int) -> tuple[int, np.ndarray]:
+    """Return (height, coverage) for a thumbnail *width*.
+
+    *coverage* has shape (height * width, n_paints): the fraction of each
+    output pixel covered by each paint, from a SUPERSAMPLE² grid.
+    """
+    height = max(1, round(width * VIEW_H / VIEW_W))
+    ss = SUPERSAMPLE
+    xs = (np.arange(width * ss, dtype=np.float32) + 0.5) * (VIEW_W / (width * ss))
+    ys = (np.arange(height * ss, dtype=np.float32) + 0.5) * (VIEW_H / (height * ss))
+    X, Y = np.meshgrid(xs, ys)
+
+    labels = np.zeros(X.shape, dtype=np.uint8)
+    for kind, geom, fill, stroke, sw in _SHAPES:
+        if fill is not None:
+            labels[_fill_mask(kind, geom, X, Y)] = _LABELS[fill]
+        if stroke is not None:
+            labels[_stroke_mask(kind, geom, sw, X, Y)] = _LABELS[stroke]
+
+    blocks = labels.reshape(height, ss, width, ss).transpose(0, 2, 1, 3)
+    blocks = blocks.reshape(height * width, ss * ss)
+    coverage = np.empty((height * width, len(_PAINTS)), dtype=np.float32)
+    for i in range(len(_PAINTS)):
+        coverage[:, i] = (blocks == i).mean(axis=1)
+    return height, coverage
+
+
+def scheme_key(scheme: dict) -> tuple[str, ...]:
+    """Canonical color tuple (in SECTIONS order) for a section->hex dict."""
+    return tuple(scheme.get(s, DEFAULT_COLORS[s]).lower() for s in SECTIONS)
+
+
+def palette_scheme(colors: list[str]) -> dict:
+    """Assign palette colors to sections in SECTIONS order.
+
+    Sections beyond the palette length keep their default color.
+    """
+    return {s: colors[i] if i < len(colors) else DEFAULT_COLORS[s]
+            for i, s in enumerate(SECTIONS)}
+
+
+def render_thumbnails(keys: list[tuple[str, ...]], width: int = THUMB_WIDTH,
+                      background: str = "#ffffff") -> np.ndarray:
+    """Render color tuples (see scheme_key) to an (N, H, W, 3) uint8 array."""
+    height, coverage = _coverage(width)
+    lut = np.empty((len(keys), len(_PAINTS), 3), dtype=np.float32)
+    lut[:, 0] = hex_to_rgb(background)
+    for paint, i in _LABELS.items():
+        if paint.startswith("#"):
+            lut[:, i] = hex_to_rgb(paint)
+    for n, key in enumerate(keys):
+        for j, hex_str in enumerate(key):
+            lut[n, 1 + j] = hex_to_rgb(hex_str)
+    # Seed the LUT with +0.5 so the uint8 cast rounds instead of truncating
+    lut += 0.5
+    out = np.matmul(coverage, lut)
+    return out.astype(np.uint8).reshape(len(keys), height, width, 3)
+
+
+_cache: OrderedDict = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def thumbnails(schemes: list[dict], width: int = THUMB_WIDTH) -> list[np.ndarray]:
+    """Return one RGB thumbnail array per scheme, batch-rendering cache misses."""
+    keys = [(width, scheme_key(s)) for s in schemes]
+    with _cache_lock:
+        missing = list(dict.fromkeys(k for k in keys if k not in _cache))
+    if missing:
+        rendered = render_thumbnails([k[1] for k in missing], width)
+        with _cache_lock:
+            for k, arr in zip(missing, rendered):
+                _cache[k] = arr
+    with _cache_lock:
+        result = []
+        for k in keys:
+            arr = _cache.get(k)
+            if arr is None:
+                # Evicted by a concurrent caller between batches
+                arr = render_thumbnails([k[1]], width)[0]
+            else:
+                _cache.move_to_end(k)
+            result.append(arr)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _png(width: int, key: tuple[str, ...]) -> bytes:
+    arr = thumbnails([dict(zip(SECTIONS, key))], width)[0]
+    buf = io.BytesIO()
+    Image.fromarray(arr, "RGB").save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def thumbnail_png(scheme: dict, width: int = THUMB_WIDTH) -> bytes:
+    """PNG bytes of one scheme's thumbnail, cached by color tuple."""
+    return _png(width, scheme_key(scheme))
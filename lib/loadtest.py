@@ -0,0 +1,460 @@
+"""Headless multi-user load test for the app pages.
+
+Each simulated user drives the real page scripts through Streamlit's
+AppTest in place of a browser, following scripted journeys:
+
+- palette: browse a brand, add colors, search, match a custom color,
+  sweep harmony kinds, save the palette, explore schemes for it
+- visualizer: upload a photo, load a palette, sample and apply color
+  replaces, sweep the tolerance and opacity sliders, draw and fill
+  polygons, undo, save / load / delete a session
+
+Every widget interaction is one script run and is timed as one rerun.
+Image clicks are sent as the click component's value, so the page's own
+click callback samples the composite and places polygon vertices.
+Users run as threads inside worker processes, the way one Streamlit
+server process serves many sessions, sharing its caches. AppTest swaps
+process-global runtime state on every run, so runs within a worker are
+serialized; a rerun's latency includes the wait behind other users,
+which makes it a conservative (queueing) measure of what a user sees.
+AppTest has no fragment reruns either: fragment widgets are measured as
+full reruns, another upper bound.
+
+    python -m lib.loadtest --workers 2 --users 4 --iterations 3
+
+All files are written to a scratch data directory (a fresh temporary
+one unless --data-dir is given), never to user_data/.
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from lib import persistence, render_cache
+from lib.house_raster import thumbnail_png
+
+ROOT = Path(__file__).resolve().parent.parent
+PAGES = {
+    "visualizer": ROOT / "pages" / "1_Color_Visualizer.py",
+    "palette": ROOT / "pages" / "2_Palette_Builder.py",
+    "scheme": ROOT / "pages" / "3_Scheme_Explorer.py",
+}
+JOURNEYS = ("palette", "visualizer")
+PERCENTILES = (50, 95, 99)
+
+PHOTO_WIDTH = 800
+SEARCH_TERMS = ["white", "blue", "gray", "green", "red", "sand"]
+
+
+def use_data_dir(path: Path):
+    """Point persistence and the render cache at *path* for this process."""
+    persistence.DATA_DIR = Path(path)
+    render_cache.CACHE_DIR = persistence.DATA_DIR / "render_cache"
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident set size of this process in MB (None if unknown)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+# AppTest.run installs and clears a process-wide mock Runtime
+_run_lock = threading.Lock()
+
+
+class JourneyError(Exception):
+    """A page raised, or an expected widget was missing."""
+
+
+class User:
+    """One simulated browser session replaying journeys against the pages."""
+
+    def __init__(self, name: str, seed: int, photo: bytes, timeout: float):
+        self.name = name
+        self.rng = random.Random(seed)
+        self.photo = photo
+        self.timeout = timeout
+        self.samples: list[tuple[str, float]] = []
+        self.errors: list[str] = []
+        # Saves dropped by a concurrent writer (see _lost_update)
+        self.lost_updates = 0
+        self.recording = True
+        # Wall-clock bounds of the measured rounds, comparable across processes
+        self.window: tuple[float, float] | None = None
+
+    # ── Helpers ──
+
+    def _open(self, page: str):
+        from streamlit.testing.v1 import AppTest
+        at = AppTest.from_file(str(PAGES[page]), default_timeout=self.timeout)
+        return self._run("open_" + page, at)
+
+    def _run(self, step: str, at):
+        """Run the script once for *at* (an AppTest or a touched widget)."""
+        t0 = time.perf_counter()
+        with _run_lock:
+            at = at.run()
+        if self.recording:
+            self.samples.append((step, time.perf_counter() - t0))
+        if at.exception:
+            raise JourneyError(f"{step}: {at.exception[0].message}")
+        return at
+
+    @staticmethod
+    def _find(elements, label=None, key=None):
+        for el in elements:
+            if (label is None or el.label == label) and (key is None or el.key == key):
+                return el
+        raise JourneyError(f"widget not found: {label or key}")
+
+    def _click(self, step: str, at, label=None, key=None):
+        return self._run(step, self._find(at.button, label, key).click())
+
+    def _click_image(self, step: str, at, x: int, y: int):
+        """Click the photo at (*x*, *y*) through the click component.
+
+        AppTest has no driver for custom components, so the component's
+        value is sent with the other widget states, as the browser would;
+        the page's real on_click callback then runs in that rerun.
+        """
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        comp = self._find([el for el in at.main if hasattr(el, "id")], key="photo_click")
+        states = comp.root.get_widget_states()
+        click = WidgetState(id=comp.id)
+        click.json_value = json.dumps({"x": x, "y": y, "unix_time": time.time_ns()})
+        states.widgets.append(click)
+        t0 = time.perf_counter()
+        with _run_lock:
+            # Only the private entry point accepts extra widget states
+            at = at._run(states)
+        if self.recording:
+            self.samples.append((step, time.perf_counter() - t0))
+        if at.exception:
+            raise JourneyError(f"{step}: {at.exception[0].message}")
+        return at
+
+    @staticmethod
+    def _selectbox(at, key):
+        return next((s for s in at.selectbox if s.key == key), None)
+
+    def _lost_update(self, at, key: str, name: str, selected: bool = False) -> bool:
+        """True if *name* is missing from selectbox *key* (or, with
+        *selected*, is no longer its value).
+
+        Saved palettes and sessions each live in one JSON file that every
+        save rewrites whole, so a concurrent save from another user can
+        drop ours: the app's own read-modify-write race. That is counted,
+        not reported as a failure.
+        """
+        box = self._selectbox(at, key)
+        ok = box is not None and (box.value == name if selected else name in box.options)
+        if not ok and self.recording:
+            self.lost_updates += 1
+        return not ok
+
+    # ── Journeys ──
+
+    def palette(self):
+        pal_name = f"loadtest {self.name}"
+        at = self._open("palette")
+
+        # Drop this user's palette from a previous iteration
+        for exp in at.sidebar.expander:
+            if exp.label == pal_name:
+                at = self._run("delete_palette", exp.button[0].click())
+                break
+
+        brand_box = self._find(at.selectbox, label="Select brand")
+        brand = self.rng.choice(brand_box.options)
+        at = self._run("brand", brand_box.set_value(brand))
+        adds = [b for b in at.button if b.key and b.key.startswith(f"add_{brand}_")]
+        for b in self.rng.sample(adds, min(5, len(adds))):
+            at = self._click("add_color", at, key=b.key)
+
+        search = self._find(at.text_input, key="global_search")
+        at = self._run("search", search.input(self.rng.choice(SEARCH_TERMS)))
+        picker = self._find(at.color_picker, label="Pick a color")
+        at = self._run("match", picker.pick(f"#{self.rng.randrange(1 << 24):06x}"))
+        kinds = self._find(at.selectbox, key="harmony_kind")
+        for kind in kinds.options:
+            at = self._run("harmony", self._find(at.selectbox, key="harmony_kind")
+                           .set_value(kind))
+
+        at = self._run("palette_name", self._find(at.text_input, label="Palette name")
+                       .input(pal_name))
+        at = self._click("save_palette", at, label="Save Palette")
+
+        at = self._open("scheme")
+        if not self._lost_update(at, "scheme_palette", pal_name):
+            at = self._run("scheme_palette", self._selectbox(at, "scheme_palette")
+                           .set_value(pal_name))
+        for top_n in (6, 18, 30):
+            at = self._run("scheme_top_n", self._find(at.slider, key="scheme_top_n")
+                           .set_value(top_n))
+
+    def visualizer(self):
+        session = f"loadtest {self.name}"
+        at = self._open("visualizer")
+        uploader = self._find(at.file_uploader)
+        at = self._run("upload", uploader.set_value(("house.png", self.photo, "image/png")))
+
+        if any(b.label == "Load Palette" for b in at.button):
+            at = self._click("load_palette", at, label="Load Palette")
+            swatches = self._find(at.radio, key="palette_active")
+            at = self._run("pick_color", swatches.set_value(
+                self.rng.randrange(len(swatches.options))))
+        else:
+            at = self._run("pick_color", self._find(at.color_picker, key="photo_custom_color")
+                           .pick(f"#{self.rng.randrange(1 << 24):06x}"))
+
+        h, w = at.session_state.photo_buffers["work"].shape[:2]
+        for _ in range(5):
+            at = self._click_image("sample", at, self.rng.randrange(w), self.rng.randrange(h))
+            if at.session_state.photo_sampled_color is None:
+                raise JourneyError("sample: image click did not reach the page")
+            at = self._click("color_replace", at, label="Apply Color Replace")
+
+        for tol in (10, 40, 70, 30):
+            at = self._run("tolerance", self._find(at.slider, key="photo_tolerance")
+                           .set_value(tol))
+        for alpha in (60, 180, 255, 120):
+            at = self._run("opacity", self._find(at.slider, key="photo_opacity")
+                           .set_value(alpha))
+
+        at = self._run("tool", self._find(at.radio, key="photo_tool").set_value("Polygon"))
+        for _ in range(2):
+            cx, cy = self.rng.randrange(w), self.rng.randrange(h)
+            for k in range(4):
+                angle = k * np.pi / 2 + self.rng.random()
+                # The component only reports clicks on the image
+                x = min(max(int(cx + 80 * np.cos(angle)), 0), w - 1)
+                y = min(max(int(cy + 80 * np.sin(angle)), 0), h - 1)
+                at = self._click_image("vertex", at, x, y)
+            if len(at.session_state.photo_points) < 3:
+                raise JourneyError("vertex: image clicks did not reach the page")
+            at = self._click("close_polygon", at, label="Close Polygon")
+        at = self._click("fill_polygons", at, label="Fill All Polygons")
+        at = self._click("undo", at, label="Undo Last Fill")
+
+        at = self._run("session_name", self._find(at.text_input, key="photo_session_name")
+                       .input(session))
+        at = self._click("save_session", at, label="Save Current Work")
+        if self._lost_update(at, "photo_load_session", session):
+            return
+        at = self._run("select_session", self._selectbox(at, "photo_load_session")
+                       .set_value(session))
+        # Re-check before each button: Load / Delete act on whatever is
+        # selected, which would be another user's session if ours is gone
+        if self._lost_update(at, "photo_load_session", session, selected=True):
+            return
+        at = self._click("load_session", at, label="Load Session")
+        if self._lost_update(at, "photo_load_session", session, selected=True):
+            return
+        at = self._click("delete_session", at, label="Delete Session")
+
+    def run(self, journeys, iterations: int, warmup: int):
+        for i in range(warmup + iterations):
+            self.recording = i >= warmup
+            if i == warmup:
+                start = time.time()
+            for journey in journeys:
+                try:
+                    getattr(self, journey)()
+                except JourneyError as e:
+                    self.errors.append(str(e))
+                except Exception:
+                    self.errors.append(traceback.format_exc(limit=3))
+        if iterations:
+            self.window = (start, time.time())
+
+
+def worker(index: int, users: int, journeys, iterations: int, warmup: int,
+           data_dir: str, seed: int, timeout: float) -> dict:
+    """Run *users* concurrent users in this process and return raw samples."""
+    from streamlit import config, logger
+
+    # Otherwise every AppTest run logs "missing ScriptRunContext" warnings.
+    # Parse the config first: parsing resets the level from logger.level.
+    config.get_config_options()
+    logger.set_log_level("error")
+    use_data_dir(Path(data_dir))
+    photo = thumbnail_png({}, width=PHOTO_WIDTH)
+    sims = [User(f"w{index}u{u}", seed * 1000 + index * 100 + u, photo, timeout)
+            for u in range(users)]
+    threads = [threading.Thread(target=s.run, args=(journeys, iterations, warmup))
+               for s in sims]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    windows = [s.window for s in sims if s.window]
+    return {
+        "worker": index,
+        "window": (min(w[0] for w in windows), max(w[1] for w in windows))
+        if windows else None,
+        "samples": [s for sim in sims for s in sim.samples],
+        "errors": [e for sim in sims for e in sim.errors],
+        "lost_updates": sum(sim.lost_updates for sim in sims),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _stats(latencies) -> dict:
+    if not len(latencies):
+        return {"reruns": 0}
+    ms = np.asarray(latencies) * 1000
+    out = {"reruns": len(ms), "mean_ms": round(float(ms.mean()), 1)}
+    for p, v in zip(PERCENTILES, np.percentile(ms, PERCENTILES)):
+        out[f"p{p}_ms"] = round(float(v), 1)
+    return out
+
+
+def _span(window) -> float:
+    return window[1] - window[0] if window else 0.0
+
+
+def summarize(results: list[dict]) -> dict:
+    """Aggregate worker results into overall, per-worker and per-step stats.
+
+    Throughput counts measured reruns over the measured wall-clock window,
+    so process startup and warmup rounds are excluded.
+    """
+    samples = [s for r in results for s in r["samples"]]
+    windows = [r["window"] for r in results if r["window"]]
+    wall = _span((min(w[0] for w in windows), max(w[1] for w in windows))
+                 if windows else None)
+    overall = _stats([d for _, d in samples])
+    overall["wall_s"] = round(wall, 2)
+    overall["throughput_rps"] = round(len(samples) / wall, 2) if wall else 0.0
+    overall["errors"] = sum(len(r["errors"]) for r in results)
+    overall["lost_updates"] = sum(r["lost_updates"] for r in results)
+
+    steps: dict[str, list[float]] = {}
+    for step, d in samples:
+        steps.setdefault(step, []).append(d)
+    return {
+        "overall": overall,
+        "workers": [
+            {
+                "worker": r["worker"],
+                **_stats([d for _, d in r["samples"]]),
+                "throughput_rps": round(len(r["samples"]) / _span(r["window"]), 2)
+                if r["window"] else 0.0,
+                "peak_rss_mb": None if r["peak_rss_mb"] is None
+                else round(r["peak_rss_mb"], 1),
+                "errors": len(r["errors"]),
+                "lost_updates": r["lost_updates"],
+            }
+            for r in results
+        ],
+        "steps": {step: _stats(d) for step, d in sorted(steps.items())},
+        "error_samples": [e for r in results for e in r["errors"]][:10],
+    }
+
+
+def _table(rows: list[dict], first: str, columns: list[str]) -> str:
+    head = [first] + columns
+    body = [[str(r.get(c, "")) if r.get(c) is not None else "-" for c in head]
+            for r in rows]
+    widths = [max(len(x) for x in col) for col in zip(head, *body)]
+    return "\n".join("  ".join(x.rjust(w) for x, w in zip(line, widths))
+                     for line in [head] + body)
+
+
+def report(summary: dict) -> str:
+    o = summary["overall"]
+    cols = ["reruns"] + [f"p{p}_ms" for p in PERCENTILES]
+    lines = [
+        "Note: runs within a worker are serialized (AppTest is not thread-safe),",
+        "so its users take turns: latency includes that queueing, and per-worker",
+        "throughput is one-at-a-time throughput, not a concurrency capacity.",
+        "Fragment widgets are timed as full reruns.",
+        "",
+        f"{o['reruns']} reruns in {o['wall_s']} s — {o['throughput_rps']} reruns/s, "
+        f"{o['errors']} errors, {o['lost_updates']} lost saves (concurrent writes)",
+        "  ".join(f"p{p} {o.get(f'p{p}_ms', '-')} ms" for p in PERCENTILES),
+        "",
+        _table(summary["workers"], "worker",
+               cols + ["throughput_rps", "peak_rss_mb", "errors", "lost_updates"]),
+        "",
+        _table([{"step": k, **v} for k, v in summary["steps"].items()], "step",
+               cols + ["mean_ms"]),
+    ]
+    if summary["error_samples"]:
+        lines += ["", "First errors:"] + [f"  {e.strip()}" for e in summary["error_samples"]]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Load-test the HouseColors pages with simulated users.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes (default 1)")
+    parser.add_argument("--users", type=int, default=4,
+                        help="concurrent users per worker (default 4)")
+    parser.add_argument("--iterations", type=int, default=3,
+                        help="measured journey rounds per user (default 3)")
+    parser.add_argument("--warmup", type=int, default=1,
+                        help="unmeasured rounds first (default 1)")
+    parser.add_argument("--journeys", default=",".join(JOURNEYS),
+                        help=f"comma-separated, from {', '.join(JOURNEYS)}")
+    parser.add_argument("--data-dir", type=Path,
+                        help="scratch data directory (default: a temporary one)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=60.0,
+                        help="per-rerun timeout in seconds (default 60)")
+    parser.add_argument("--json", type=Path, help="also write the summary here")
+    args = parser.parse_args(argv)
+
+    journeys = [j.strip() for j in args.journeys.split(",") if j.strip()]
+    unknown = set(journeys) - set(JOURNEYS)
+    if unknown:
+        parser.error(f"unknown journeys: {', '.join(sorted(unknown))}")
+
+    data_dir = args.data_dir or Path(tempfile.mkdtemp(prefix="housecolors-loadtest-"))
+    data_dir.mkdir(parents=True, exist_ok=True)
+    print(f"{args.workers} worker(s) x {args.users} user(s), journeys: "
+          f"{', '.join(journeys)}, data in {data_dir}")
+    try:
+        # Fresh interpreters, so each worker's peak RSS is its own
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(args.workers, mp_context=ctx) as pool:
+            futures = [
+                pool.submit(worker, i, args.users, journeys, args.iterations,
+                            args.warmup, str(data_dir), args.seed, args.timeout)
+                for i in range(args.workers)
+            ]
+            results = [f.result() for f in futures]
+    finally:
+        if args.data_dir is None:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    summary = summarize(results)
+    print(report(summary))
+    if args.json:
+        args.json.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    return 1 if summary["overall"]["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
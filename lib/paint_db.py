@@ -1,10 +1,19 @@
-"""Load and search paint brand color databases."""
+"""Load and search paint brand color databases.
+
+Lookups run against a catalog: the memory-mapped store built by
+``python -m lib.catalog_store`` when present, else the bundled JSON brands.
+"""
 
 import json
+import re
 from pathlib import Path
-from lib.color_utils import hex_to_rgb, color_distance
+import numpy as np
+from lib import catalog_store
+from lib.color_utils import hex_to_rgb
 
-BRANDS_DIR = Path(__file__).resolve().parent.parent / "data" / "paint_brands"
+DATA_ROOT = Path(__file__).resolve().parent.parent / "data"
+BRANDS_DIR = DATA_ROOT / "paint_brands"
+CATALOG_PATH = DATA_ROOT / "catalog.bin"
 
 
 def load_brand(filename: str) -> dict:
@@ -22,28 +31,142 @@ def load_all_brands() -> list[dict]:
     return brands
 
 
-def search_by_name(query: str, brands: list[dict] | None = None) -> list[dict]:
-    """Return colors whose name contains *query* (case-insensitive)."""
+def build_catalog(brands: list[dict] | None = None) -> dict:
+    """Pack *brands* (default: the bundled JSON files) into an in-memory catalog.
+
+    The result has the same layout as a memory-mapped store, see
+    ``lib.catalog_store.from_buffer``.
+    """
     if brands is None:
         brands = load_all_brands()
-    query_lower = query.lower()
+    rows = (
+        (brand["brand"], color["name"], color.get("code", ""), hex_to_rgb(color["hex"]))
+        for brand in brands for color in brand["colors"]
+    )
+    return catalog_store.from_buffer(catalog_store.encode(rows))
+
+
+_loaded = {"stamp": None, "catalog": None}
+
+
+def load_catalog(path: Path | None = None) -> dict:
+    """Return the catalog store at *path* (default CATALOG_PATH), memory-mapped.
+
+    Falls back to the bundled JSON brands when no store has been built.
+    The result is cached until the underlying files change.
+    """
+    path = CATALOG_PATH if path is None else path
+    if path.exists():
+        st = path.stat()
+        stamp = (str(path), st.st_mtime_ns, st.st_size)
+    else:
+        stamp = tuple((p.name, p.stat().st_mtime_ns)
+                      for p in sorted(BRANDS_DIR.glob("*.json")))
+    if _loaded["stamp"] != stamp:
+        catalog = catalog_store.open_store(path) if path.exists() else build_catalog()
+        _loaded.update(stamp=stamp, catalog=catalog)
+    return _loaded["catalog"]
+
+
+def brand_range(brand: str, catalog: dict | None = None) -> tuple[int, int]:
+    """Return the catalog rows ``(start, stop)`` owned by *brand*."""
+    if catalog is None:
+        catalog = load_catalog()
+    b = catalog["brands"].index(brand)
+    return int(catalog["offsets"][b]), int(catalog["offsets"][b + 1])
+
+
+def brand_colors(brand: str, catalog: dict | None = None,
+                 start: int = 0, stop: int | None = None) -> list[dict]:
+    """Return colors *start*:*stop* of *brand* (default: all of them).
+
+    Only the requested rows are decoded, so paging through a large brand
+    stays cheap.
+    """
+    if catalog is None:
+        catalog = load_catalog()
+    lo, hi = brand_range(brand, catalog)
+    stop = hi - lo if stop is None else min(stop, hi - lo)
+    return catalog["colors"][lo + start:lo + max(start, stop)]
+
+
+def _name_matches(query: str, catalog: dict, start: int = 0, stop: int | None = None):
+    """Iterate over matches of *query* in the names of rows *start*:*stop*."""
+    # Scan the lowercase name blob in place; names are newline-terminated
+    # so a match never spans two rows
+    pattern = re.compile(re.escape(query.lower().encode("utf-8")))
+    off = catalog["search_off"]
+    stop = len(catalog["colors"]) if stop is None else stop
+    return pattern.finditer(catalog["search_blob"].data, int(off[start]), int(off[stop]))
+
+
+def search_rows(query: str, catalog: dict | None = None,
+                start: int = 0, stop: int | None = None) -> np.ndarray:
+    """Return the row indices in *start*:*stop* whose name contains *query*."""
+    if catalog is None:
+        catalog = load_catalog()
+    pos = np.fromiter((m.start() for m in _name_matches(query, catalog, start, stop)),
+                      dtype=np.int64)
+    return np.unique(np.searchsorted(catalog["search_off"], pos, side="right") - 1)
+
+
+def search_by_name(query: str, catalog: dict | None = None,
+                   limit: int | None = None) -> list[dict]:
+    """Return colors whose name contains *query* (case-insensitive)."""
+    if catalog is None:
+        catalog = load_catalog()
+    off = catalog["search_off"]
     results = []
-    for brand in brands:
-        for color in brand["colors"]:
-            if query_lower in color["name"].lower():
-                results.append({**color, "brand": brand["brand"]})
+    last = -1
+    for m in _name_matches(query, catalog):
+        row = int(np.searchsorted(off, m.start(), side="right")) - 1
+        if row == last:
+            continue
+        last = row
+        results.append(catalog["colors"][row])
+        if limit is not None and len(results) >= limit:
+            break
     return results
 
 
-def find_closest(hex_str: str, n: int = 5, brands: list[dict] | None = None) -> list[dict]:
+def find_closest(hex_str: str, n: int = 5, catalog: dict | None = None) -> list[dict]:
     """Return the *n* closest paint colors to the given hex value."""
-    if brands is None:
-        brands = load_all_brands()
-    target = hex_to_rgb(hex_str)
-    scored = []
-    for brand in brands:
-        for color in brand["colors"]:
-            dist = color_distance(target, hex_to_rgb(color["hex"]))
-            scored.append({**color, "brand": brand["brand"], "distance": round(dist, 2)})
-    scored.sort(key=lambda c: c["distance"])
-    return scored[:n]
+    if catalog is None:
+        catalog = load_catalog()
+    target = np.array(hex_to_rgb(hex_str), dtype=np.int32)
+    diff = catalog["rgb"].astype(np.int32) - target
+    dist = np.sqrt((diff * diff).sum(axis=1))
+    n = min(n, len(dist))
+    if n == 0:
+        return []
+    top = np.argpartition(dist, n - 1)[:n]
+    top = top[np.lexsort((top, dist[top]))]
+    return [{**catalog["colors"][int(i)], "distance": round(float(dist[i]), 2)}
+            for i in top]
+
+
+def nearest_per_brand(lab: np.ndarray, catalog: dict,
+                      chunk: int = 65536) -> tuple[np.ndarray, np.ndarray]:
+    """Snap (M, 3) Lab queries to the closest paint of every brand.
+
+    Returns ``(idx, dist)``, both (M, n_brands): catalog row indices and
+    Lab (Delta E 1976) distances. Brands with no colors get index -1.
+    """
+    q = np.asarray(lab, dtype=np.float32).reshape(-1, 3)
+    q_sq = (q * q).sum(axis=1)[:, None]
+    n_brands = len(catalog["brands"])
+    idx = np.full((len(q), n_brands), -1, dtype=np.int64)
+    best = np.full((len(q), n_brands), np.inf, dtype=np.float32)
+    offsets = catalog["offsets"]
+    for b in range(n_brands):
+        for start in range(int(offsets[b]), int(offsets[b + 1]), chunk):
+            stop = min(start + chunk, int(offsets[b + 1]))
+            ref = catalog["lab"][start:stop]
+            # |q - r|^2 = |q|^2 - 2 q.r + |r|^2, one matmul per chunk
+            d = q_sq - 2 * (q @ ref.T) + (ref * ref).sum(axis=1)
+            j = d.argmin(axis=1)
+            dj = d[np.arange(len(q)), j]
+            better = dj < best[:, b]
+            best[better, b] = dj[better]
+            idx[better, b] = start + j[better]
+    return idx, np.sqrt(np.maximum(best, 0))
@@ -1,22 +1,40 @@
-"""JSON persistence helpers — atomic writes via Path.replace()."""
+"""JSON persistence helpers — atomic writes via Path.replace().
 
+Reads are cached by file mtime/size, so reruns that load the same file
+skip parsing; callers get a private copy they can mutate.
+"""
+
+import copy
 import json
 from pathlib import Path
 
 DATA_DIR = Path(__file__).resolve().parent.parent / "user_data"
 
+_cache: dict = {}
+
 
 def _ensure_dir():
     DATA_DIR.mkdir(exist_ok=True)
 
 
+def _stamp(path: Path):
+    st = path.stat()
+    return st.st_mtime_ns, st.st_size
+
+
 def load_json(filename: str, default=None):
     """Load a JSON file from user_data/. Returns *default* if missing."""
     path = DATA_DIR / filename
     if not path.exists():
         return default if default is not None else {}
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    stamp = _stamp(path)
+    cached = _cache.get(path)
+    if cached is None or cached[0] != stamp:
+        with open(path, "r", encoding="utf-8") as f:
+            cached = (stamp, json.load(f))
+        _cache[path] = cached
+    # Strings are shared, only containers are copied
+    return copy.deepcopy(cached[1])
 
 
 def save_json(filename: str, data):
@@ -27,3 +45,5 @@ def save_json(filename: str, data):
     with open(tmp, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=2)
     tmp.replace(path)
+    # Don't trust mtime alone for a write in the same clock tick
+    _cache.pop(path, None)
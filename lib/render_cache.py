@@ -0,0 +1,153 @@
+"""Disk-backed render cache — composited images keyed by content hash.
+
+Entries are raw ``.npy`` arrays addressed by a chained hash of the base
+image and the canonicalized fill list, so every prefix of a fill stack is
+its own checkpoint and any worker process can reuse another's results.
+Writes are atomic (temp file + ``os.replace``) and eviction is LRU by
+mtime, which is bumped on every hit.
+"""
+
+import hashlib
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+from lib.persistence import DATA_DIR
+
+CACHE_DIR = DATA_DIR / "render_cache"
+MAX_BYTES = 512 * 1024 * 1024
+# Temp files older than this were left by a writer that died mid-store
+STALE_TMP_SECONDS = 60
+
+
+def image_hash(arr: np.ndarray) -> str:
+    """Content hash of an image array (shape, dtype and pixels)."""
+    h = hashlib.sha256()
+    h.update(f"{arr.shape}{arr.dtype}".encode("ascii"))
+    h.update(np.ascontiguousarray(arr).data)
+    return h.hexdigest()
+
+
+def _canonical(fill: dict) -> bytes:
+    """Stable byte form of a fill — tuples and lists serialize alike."""
+    return json.dumps(fill, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def prefix_keys(img_hash: str, fills: list[dict]) -> list[str]:
+    """Return cache keys for every prefix of *fills* (index 0 = no fills)."""
+    keys = [img_hash]
+    for fill in fills:
+        h = hashlib.sha256(keys[-1].encode("ascii"))
+        h.update(_canonical(fill))
+        keys.append(h.hexdigest())
+    return keys
+
+
+def _path(key: str) -> Path:
+    return CACHE_DIR / f"{key}.npy"
+
+
+def load(key: str, out: np.ndarray | None = None) -> np.ndarray | None:
+    """Return the cached array for *key*, or None on a miss.
+
+    With *out*, the entry is copied into that buffer through a memory map
+    (no new array is allocated); entries of another shape count as misses.
+    """
+    path = _path(key)
+    try:
+        if out is None:
+            arr = np.load(path, allow_pickle=False)
+        else:
+            mapped = np.load(path, mmap_mode="r", allow_pickle=False)
+            if mapped.shape != out.shape or mapped.dtype != out.dtype:
+                return None
+            np.copyto(out, mapped)
+            arr = out
+        os.utime(path)
+    except (FileNotFoundError, ValueError, OSError):
+        # Missing, evicted by another worker mid-read, or truncated
+        return None
+    return arr
+
+
+def store(key: str, arr: np.ndarray, max_bytes: int = MAX_BYTES) -> bool:
+    """Atomically write *arr* under *key*, then trim the cache to *max_bytes*.
+
+    The cache is only an optimization: a failed write (disk full, no
+    permission, target locked by a reader) is dropped and False returned.
+    """
+    path = _path(key)
+    tmp = path.with_name(f"{key}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "wb") as f:
+            np.save(f, arr, allow_pickle=False)
+        tmp.replace(path)
+    except OSError:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        return False
+    evict(max_bytes)
+    return True
+
+
+def lookup(img_hash: str, fills: list[dict],
+           out: np.ndarray | None = None) -> tuple[int, np.ndarray | None, list[str]]:
+    """Find the longest cached prefix of *fills*.
+
+    Returns ``(n, arr, keys)`` where *arr* is the composite after the first
+    *n* fills (None if nothing is cached) and *keys* are the prefix keys.
+    With *out*, a hit is copied into that buffer (see load). The bare
+    image (n = 0) is never stored, so it is not looked up.
+    """
+    keys = prefix_keys(img_hash, fills)
+    for n in range(len(keys) - 1, 0, -1):
+        arr = load(keys[n], out)
+        if arr is not None:
+            return n, arr, keys
+    return 0, None, keys
+
+
+def evict(max_bytes: int = MAX_BYTES):
+    """Delete least-recently-used entries until the cache fits *max_bytes*.
+
+    Temp files abandoned by a writer that died before its rename are
+    removed once they are older than STALE_TMP_SECONDS.
+    """
+    entries = []
+    total = 0
+    stale_before = time.time() - STALE_TMP_SECONDS
+    for path in CACHE_DIR.glob("*.tmp"):
+        try:
+            if path.stat().st_mtime < stale_before:
+                path.unlink()
+        except OSError:
+            # Already gone, or still held open by its writer
+            pass
+    for path in CACHE_DIR.glob("*.npy"):
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+        total += st.st_size
+    if total <= max_bytes:
+        return
+    entries.sort()
+    for _, size, path in entries:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError:
+            # In use by a reader (Windows) or not ours to delete; try the next
+            continue
+        total -= size
+        if total <= max_bytes:
+            break
@@ -0,0 +1,173 @@
+"""Whole-house scheme explorer — score section assignments of a palette in bulk.
+
+A scheme assigns one palette color to every section in SECTIONS (colors
+may repeat). Its score is a sum of per-section terms and pairwise terms
+(body/trim contrast, door accent, ...), all precomputed as (P,) and
+(P, P) arrays. The search assigns sections one at a time over the whole
+frontier of partial schemes with numpy, and prunes every partial whose
+optimistic bound cannot beat the current top N.
+"""
+
+import numpy as np
+
+from lib.color_utils import hex_to_rgb_array, rgb_to_lab, relative_luminance
+from lib.house_svg import SECTIONS
+
+# Sections are assigned in this order; big surfaces first so bounds tighten early
+SEARCH_ORDER = ["body", "trim", "roof", "door", "shutters", "garage", "windows"]
+
+MAX_FRONTIER = 250_000
+
+WEIGHTS = {
+    "body_muted": 1.0,        # large body surfaces read best in low chroma
+    "windows_neutral": 0.5,   # glass/sash colors stay neutral
+    "body_trim_contrast": 2.0,
+    "roof_darker": 1.0,       # roof darker than the body grounds the house
+    "door_accent": 1.5,       # door stands out from the body...
+    "door_harmony": 1.0,      # ...in a hue that works with it
+    "shutter_contrast": 1.0,
+    "shutter_harmony": 0.5,
+    "accent_harmony": 0.5,    # door and shutters coordinate
+    "garage_blend": 1.0,      # garage door blends into the body
+    "windows_trim_contrast": 0.5,
+}
+
+# Hue differences (degrees) that read as harmonious: analogous,
+# triadic, complementary
+_HARMONY_ANGLES = np.array([0.0, 30.0, 120.0, 180.0])
+
+
+def _color_metrics(rgb: np.ndarray) -> dict:
+    """Per-color and pairwise metrics for a (P, 3) RGB palette."""
+    lab = rgb_to_lab(rgb)
+    lum = relative_luminance(rgb)
+    hi = np.maximum(lum[:, None], lum[None, :])
+    lo = np.minimum(lum[:, None], lum[None, :])
+    chroma = np.hypot(lab[:, 1], lab[:, 2])
+    hue = np.degrees(np.arctan2(lab[:, 2], lab[:, 1]))
+    dh = np.abs(hue[:, None] - hue[None, :]) % 360
+    dh = np.minimum(dh, 360 - dh)
+    fit = np.exp(-((dh[..., None] - _HARMONY_ANGLES) ** 2) / (2 * 15.0 ** 2)).max(axis=-1)
+    # Neutrals go with anything
+    neutral = np.clip(np.minimum(chroma[:, None], chroma[None, :]) / 15.0, 0, 1)
+    return {
+        "L": lab[:, 0],
+        "chroma": chroma,
+        "contrast": (hi + 0.05) / (lo + 0.05),
+        "delta_e": np.linalg.norm(lab[:, None, :] - lab[None, :, :], axis=-1),
+        "harmony": neutral * fit + (1 - neutral),
+    }
+
+
+def score_terms(rgb: np.ndarray, weights: dict | None = None):
+    """Return (unary, pair) score arrays for a (P, 3) RGB palette.
+
+    *unary* maps section -> (P,) and *pair* maps (a, b) -> (P, P) indexed
+    [color of a, color of b], with a before b in SEARCH_ORDER.
+    """
+    w = {**WEIGHTS, **(weights or {})}
+    m = _color_metrics(rgb)
+    n = len(rgb)
+    unary = {s: np.zeros(n) for s in SECTIONS}
+    unary["body"] += w["body_muted"] * (1 - np.clip(m["chroma"] / 60, 0, 1))
+    unary["windows"] += w["windows_neutral"] * (1 - np.clip(m["chroma"] / 40, 0, 1))
+
+    L_diff = m["L"][:, None] - m["L"][None, :]
+    pair = {
+        ("body", "trim"): w["body_trim_contrast"]
+        * np.clip((m["contrast"] - 1) / 3.5, 0, 1),
+        ("body", "roof"): w["roof_darker"] * np.clip(L_diff / 30, -1, 1),
+        ("body", "door"): w["door_accent"] * np.clip(m["delta_e"] / 40, 0, 1)
+        + w["door_harmony"] * m["harmony"],
+        ("body", "shutters"): w["shutter_contrast"] * np.clip(m["delta_e"] / 30, 0, 1)
+        + w["shutter_harmony"] * m["harmony"],
+        ("door", "shutters"): w["accent_harmony"] * m["harmony"],
+        ("body", "garage"): w["garage_blend"] * (1 - np.clip(m["delta_e"] / 40, 0, 1)),
+        ("trim", "windows"): w["windows_trim_contrast"]
+        * np.clip((m["contrast"] - 1) / 3.5, 0, 1),
+    }
+    return unary, pair
+
+
+def score_schemes(assign: np.ndarray, unary: dict, pair: dict) -> np.ndarray:
+    """Score an (M, 7) array of color indices in SEARCH_ORDER columns."""
+    col = {s: i for i, s in enumerate(SEARCH_ORDER)}
+    total = np.zeros(len(assign))
+    for s, u in unary.items():
+        total += u[assign[:, col[s]]]
+    for (a, b), mat in pair.items():
+        total += mat[assign[:, col[a]], assign[:, col[b]]]
+    return total
+
+
+def _search(unary, pair, top_n, max_frontier, threshold=-np.inf):
+    """Level-by-level branch and bound over SEARCH_ORDER.
+
+    Returns (assign, scores, exact); *exact* is False if the frontier had
+    to be truncated to *max_frontier* partials (beam search).
+    """
+    k_total = len(SEARCH_ORDER)
+    # Optimistic remaining score once the first k sections are assigned
+    remaining = np.zeros(k_total + 1)
+    for k in range(k_total):
+        later = SEARCH_ORDER[k:]
+        bound = sum(unary[s].max() for s in later)
+        bound += sum(mat.max() for (a, b), mat in pair.items() if b in later)
+        remaining[k] = bound
+
+    assign = np.zeros((1, 0), dtype=np.int16)
+    scores = np.zeros(1)
+    exact = True
+    for k, section in enumerate(SEARCH_ORDER):
+        # (M, P) scores for every partial extended by every color
+        ext = scores[:, None] + unary[section][None, :]
+        for (a, b), mat in pair.items():
+            if b == section:
+                ext = ext + mat[assign[:, SEARCH_ORDER.index(a)]]
+        bound = ext + remaining[k + 1]
+        keep_m, keep_c = np.nonzero(bound >= threshold)
+        if len(keep_m) > max_frontier:
+            exact = False
+            top = np.argpartition(-bound[keep_m, keep_c], max_frontier - 1)[:max_frontier]
+            keep_m, keep_c = keep_m[top], keep_c[top]
+        assign = np.concatenate(
+            [assign[keep_m], keep_c[:, None].astype(np.int16)], axis=1)
+        scores = ext[keep_m, keep_c]
+    order = np.argsort(-scores, kind="stable")[:top_n]
+    return assign[order], scores[order], exact
+
+
+def explore(hex_list: list[str], top_n: int = 12, weights: dict | None = None,
+            max_frontier: int = MAX_FRONTIER) -> list[dict]:
+    """Return the *top_n* best section assignments of *hex_list*.
+
+    Each result is ``{"scheme": {section: hex}, "score": float,
+    "exact": bool}``. Repeated colors (compared case-insensitively) count
+    once, so no scheme is listed twice. A quick beam pass seeds the
+    pruning threshold, then a branch-and-bound pass searches every
+    assignment that could still make the top N.
+    """
+    # Keep the first spelling of each color, in palette order
+    first = {}
+    for h in hex_list:
+        first.setdefault(h.lower(), h)
+    unique = list(first.values())
+    if not unique:
+        return []
+    rgb = hex_to_rgb_array(unique)
+    unary, pair = score_terms(rgb, weights)
+    # Beam pass: cheap, approximate, but gives a real lower bound
+    seed, seed_scores, _ = _search(unary, pair, top_n, max_frontier=2000)
+    threshold = seed_scores[-1] if len(seed_scores) >= top_n else -np.inf
+    assign, _, exact = _search(unary, pair, top_n, max_frontier, threshold)
+    # Report full scores of the finished schemes rather than the search's
+    # running sums
+    scores = score_schemes(assign, unary, pair)
+    return [
+        {
+            "scheme": {s: unique[int(i)] for s, i in zip(SEARCH_ORDER, row)},
+            "score": round(float(sc), 3),
+            "exact": exact,
+        }
+        for row, sc in zip(assign, scores)
+    ]
@@ -3,15 +3,14 @@ from PIL import Image, ImageDraw
 import numpy as np
 import io
 import base64
+import json
 from streamlit_image_coordinates import streamlit_image_coordinates
 from lib.persistence import load_json, save_json
-from lib.paint_db import load_all_brands
+from lib import render_cache, compositor
 
 st.set_page_config(page_title="Color Visualizer", page_icon="\U0001f3a8", layout="wide")
 st.title("\U0001f3a8 Color Visualizer")
 
-brands = load_all_brands()
-
 # Session state defaults
 if "photo_fills" not in st.session_state:
     st.session_state.photo_fills = []
@@ -26,77 +25,131 @@ if "photo_sampled_color" not in st.session_state:
 if "photo_base_img" not in st.session_state:
     st.session_state.photo_base_img = None  # cached PIL Image
 
+# Count full script runs. Fragments rerun without executing this line, so a
+# fragment can tell whether the image on screen was drawn in the current run
+st.session_state.photo_run_id = st.session_state.get("photo_run_id", 0) + 1
+
+
+def _load_work(data):
+    """Restore a saved session into session state."""
+    if "image_b64" in data:
+        img_bytes = base64.b64decode(data["image_b64"])
+        st.session_state.photo_base_img = Image.open(
+            io.BytesIO(img_bytes)).convert("RGBA")
+    st.session_state.photo_fills = data.get("fills", [])
+    st.session_state.photo_pending = [
+        [tuple(p) for p in poly]
+        for poly in data.get("pending", [])
+    ]
+    st.session_state.photo_points = data.get("points", [])
+    st.session_state.photo_last_click = None
+
+
 # Load session option — available even without an image
-saved_work = load_json("photo_work.json", default={"sessions": {}})
-session_names = list(saved_work["sessions"].keys())
-if session_names and st.session_state.photo_base_img is None:
-    st.markdown("**Load a previous session:**")
-    load_cols = st.columns([2, 1])
-    with load_cols[0]:
-        quick_load_sel = st.selectbox("Session", session_names,
-                                      key="photo_quick_load")
-    with load_cols[1]:
-        st.markdown("<br>", unsafe_allow_html=True)
-        if st.button("Load Session", key="quick_load_btn"):
-            data = saved_work["sessions"][quick_load_sel]
-            if "image_b64" in data:
-                img_bytes = base64.b64decode(data["image_b64"])
-                st.session_state.photo_base_img = Image.open(
-                    io.BytesIO(img_bytes)).convert("RGBA")
-            st.session_state.photo_fills = data.get("fills", [])
-            st.session_state.photo_pending = [
-                [tuple(p) for p in poly]
-                for poly in data.get("pending", [])
-            ]
-            st.session_state.photo_points = data.get("points", [])
-            st.session_state.photo_last_click = None
-            st.rerun()
-    st.markdown("---")
+if st.session_state.photo_base_img is None:
+    saved_work = load_json("photo_work.json", default={"sessions": {}})
+    session_names = list(saved_work["sessions"].keys())
+    if session_names:
+        st.markdown("**Load a previous session:**")
+        load_cols = st.columns([2, 1])
+        with load_cols[0]:
+            quick_load_sel = st.selectbox("Session", session_names,
+                                          key="photo_quick_load")
+        with load_cols[1]:
+            st.markdown("<br>", unsafe_allow_html=True)
+            if st.button("Load Session", key="quick_load_btn"):
+                _load_work(saved_work["sessions"][quick_load_sel])
+                st.rerun()
+        st.markdown("---")
 
 uploaded = st.file_uploader("Upload a house photo", type=["png", "jpg", "jpeg"])
 if uploaded:
-    new_img = Image.open(uploaded).convert("RGBA")
-    MAX_W = 800
-    w, h = new_img.size
-    if w > MAX_W:
-        ratio = MAX_W / w
-        new_img = new_img.resize((MAX_W, int(h * ratio)), Image.LANCZOS)
-    st.session_state.photo_base_img = new_img
+    # Decode each upload once; reruns reuse the same image object
+    upload_id = (uploaded.file_id, uploaded.size)
+    if st.session_state.get("photo_upload_id") != upload_id:
+        new_img = Image.open(uploaded).convert("RGBA")
+        MAX_W = 800
+        w, h = new_img.size
+        if w > MAX_W:
+            ratio = MAX_W / w
+            new_img = new_img.resize((MAX_W, int(h * ratio)), Image.LANCZOS)
+        st.session_state.photo_base_img = new_img
+        st.session_state.photo_upload_id = upload_id
+
+
+class _EncodedPNG:
+    """Already-encoded PNG for the click component, which only calls
+    ``save()`` on image objects — avoids re-encoding an unchanged frame."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def save(self, fp, **kwargs):
+        fp.write(self.data)
+
 
 base_img = st.session_state.photo_base_img
 if base_img is not None:
 
+    # Base image as a uint8 array plus its content hash, memoized per image
+    # object so neither is recomputed on reruns. The session's PIL image is
+    # swapped for a view over that array, so the photo is held only once.
+    def _base(img):
+        cached = st.session_state.get("photo_base_cache")
+        if cached is None or cached[0] is not img:
+            arr = np.asarray(img)
+            arr.flags.writeable = False
+            view = Image.fromarray(arr, "RGBA")
+            st.session_state.photo_base_img = view
+            cached = (view, arr, render_cache.image_hash(arr))
+            st.session_state.photo_base_cache = cached
+        return cached[1], cached[2]
+
+    # Working buffers reused across reruns while the photo size is unchanged:
+    # the RGBA composite and the RGB display frame drawn on top of it. The
+    # *_key entries record which inputs each buffer / encoding reflects.
+    def _buffers(img):
+        bufs = st.session_state.get("photo_buffers")
+        if bufs is None or bufs["work"].shape[:2] != (img.height, img.width):
+            bufs = {
+                "work": np.empty((img.height, img.width, 4), dtype=np.uint8),
+                "display": np.empty((img.height, img.width, 3), dtype=np.uint8),
+                "work_key": None,
+                "display_key": None,
+                "download_key": None,
+            }
+            st.session_state.photo_buffers = bufs
+        return bufs
+
     # Build composited image from applied fills (each fill applied sequentially
-    # so that later fills see the result of earlier ones)
+    # so that later fills see the result of earlier ones) into the work
+    # buffer, in place. Resumes from the longest fill prefix in the render
+    # cache and checkpoints every fill applied after it, so undo and
+    # reloaded sessions are cache hits. Returns (work, fills key).
     def _composite(img):
-        result_arr = np.array(img.copy())
-        for fill in st.session_state.photo_fills:
-            if fill.get("type") == "color_replace":
-                current_rgb = result_arr[:, :, :3].astype(np.float64)
-                sampled = np.array(fill["sampled_rgb"], dtype=np.float64)
-                dist = np.sqrt(np.sum((current_rgb - sampled) ** 2, axis=2))
-                mask = dist <= fill["tolerance"]
-                r, g, b, a = fill["rgba"]
-                alpha = a / 255.0
-                new_rgb = np.array([r, g, b], dtype=np.float64)
-                blended = (new_rgb * alpha + current_rgb * (1 - alpha))
-                mask3 = mask[:, :, np.newaxis]
-                result_arr[:, :, :3] = np.where(
-                    mask3, blended, current_rgb
-                ).astype(np.uint8)
-            else:
-                result = Image.fromarray(result_arr, "RGBA")
-                overlay = Image.new("RGBA", result.size, (0, 0, 0, 0))
-                draw = ImageDraw.Draw(overlay)
-                draw.polygon(fill["pts"], fill=tuple(fill["rgba"]))
-                result = Image.alpha_composite(result, overlay)
-                result_arr = np.array(result)
-        return Image.fromarray(result_arr, "RGBA")
+        base_arr, base_hash = _base(img)
+        bufs = _buffers(img)
+        work = bufs["work"]
+        fills = st.session_state.photo_fills
+        fills_key = render_cache.prefix_keys(base_hash, fills)[-1]
+        if bufs["work_key"] == fills_key:
+            return work, fills_key
+        # The buffer is overwritten from here on: if anything below raises,
+        # it must not keep claiming to hold the previous fill stack
+        bufs["work_key"] = None
+        n_cached, cached, keys = render_cache.lookup(base_hash, fills, out=work)
+        if cached is None:
+            np.copyto(work, base_arr)
+        for i in range(n_cached, len(fills)):
+            compositor.apply_fill(work, fills[i])
+            render_cache.store(keys[i + 1], work)
+        bufs["work_key"] = fills_key
+        return work, fills_key
 
     # Draw pending polygons and current points as markers
-    def _draw_guides(img):
-        display = img.copy()
-        draw = ImageDraw.Draw(display)
+    def _draw_guides(work, fill_color):
+        display_arr = _buffers(base_img)["display"]
+        np.copyto(display_arr, work[:, :, :3])
 
         tool = st.session_state.get("photo_tool", "Color Replace")
 
@@ -104,11 +157,6 @@ if base_img is not None:
         if (tool == "Color Replace"
                 and st.session_state.photo_sampled_color is not None):
             tol = st.session_state.get("photo_tolerance", 30)
-            sampled = np.array(st.session_state.photo_sampled_color,
-                               dtype=np.float64)
-            img_arr = np.array(img)[:, :, :3].astype(np.float64)
-            dist = np.sqrt(np.sum((img_arr - sampled) ** 2, axis=2))
-            mask = dist <= tol
             # Preview: blend fill color at 40% to show what will be affected
             if fill_color:
                 r_h = int(fill_color[1:3], 16)
@@ -116,16 +164,14 @@ if base_img is not None:
                 b_h = int(fill_color[5:7], 16)
             else:
                 r_h, g_h, b_h = 255, 0, 255
-            preview_rgb = np.array([r_h, g_h, b_h], dtype=np.float64)
-            disp_arr = np.array(display)
-            current_rgb = disp_arr[:, :, :3].astype(np.float64)
-            blended = (preview_rgb * 0.4 + current_rgb * 0.6)
-            mask3 = mask[:, :, np.newaxis]
-            disp_arr[:, :, :3] = np.where(
-                mask3, blended, current_rgb
-            ).astype(np.uint8)
-            display = Image.fromarray(disp_arr, "RGBA")
-            draw = ImageDraw.Draw(display)
+            compositor.blend_matching(display_arr,
+                                      st.session_state.photo_sampled_color,
+                                      tol, (r_h, g_h, b_h), 0.4)
+
+        display = Image.fromarray(display_arr, "RGB")
+        if not (st.session_state.photo_pending or st.session_state.photo_points):
+            return display
+        draw = ImageDraw.Draw(display)
 
         # Draw closed pending polygons as outlines
         for poly in st.session_state.photo_pending:
@@ -144,29 +190,92 @@ if base_img is not None:
                            (x, y)], fill="red", width=2)
         return display
 
-    # Load saved palettes from Palette Builder
-    saved_palettes = load_json("palettes.json", default={"palettes": []})
+    def _preview_active():
+        return (st.session_state.get("photo_tool", "Color Replace") == "Color Replace"
+                and st.session_state.photo_sampled_color is not None)
+
+    # Everything the displayed frame depends on, besides the fills
+    def _guide_inputs(fill_color):
+        preview = None
+        if _preview_active():
+            preview = (tuple(st.session_state.photo_sampled_color),
+                       st.session_state.get("photo_tolerance", 30), fill_color)
+        return (preview,
+                json.dumps(st.session_state.photo_pending),
+                json.dumps(st.session_state.photo_points))
+
+    # PNG of the display frame, re-rendered only when pixel inputs change
+    def _display_png(fill_color):
+        bufs = _buffers(base_img)
+        work, fills_key = _composite(base_img)
+        display_key = (fills_key, _guide_inputs(fill_color))
+        if bufs["display_key"] != display_key:
+            buf = io.BytesIO()
+            _draw_guides(work, fill_color).save(buf, format="PNG", compress_level=1)
+            bufs["display_png"] = buf.getvalue()
+            bufs["display_key"] = display_key
+        return bufs["display_png"]
+
+    # PNG of the composited result for download, encoded once per fill stack
+    def _download_png():
+        bufs = _buffers(base_img)
+        work, fills_key = _composite(base_img)
+        if bufs["download_key"] != fills_key:
+            buf = io.BytesIO()
+            Image.fromarray(work[:, :, :3], "RGB").save(buf, format="PNG")
+            bufs["download_png"] = buf.getvalue()
+            bufs["download_key"] = fills_key
+        return bufs["download_png"]
+
+    # Handle a new click on the image — only process if it's genuinely new.
+    # Runs as the component's callback, before the rerun it triggers, so the
+    # sidebar and image reflect the click in that same run.
+    def _on_image_click():
+        coords = st.session_state.get("photo_click")
+        if coords is None:
+            return
+        click_key = (coords["x"], coords["y"])
+        if click_key == st.session_state.photo_last_click:
+            return
+        st.session_state.photo_last_click = click_key
+        if st.session_state.get("photo_tool", "Color Replace") == "Color Replace":
+            # Sample pixel color from composited image (current appearance)
+            work = st.session_state.photo_buffers["work"]
+            y = min(max(coords["y"], 0), work.shape[0] - 1)
+            x = min(max(coords["x"], 0), work.shape[1] - 1)
+            px = work[y, x]
+            st.session_state.photo_sampled_color = (
+                int(px[0]), int(px[1]), int(px[2]))
+        else:
+            st.session_state.photo_points.append(list(click_key))
 
     # Initialize working palette
     if "photo_palette" not in st.session_state:
         st.session_state.photo_palette = []
 
-    # Sidebar controls
-    with st.sidebar:
+    # Palette, fill color and opacity only reach the pixels through the
+    # color replace preview, so they rerun on their own and escalate to a
+    # full rerun only when the preview on screen is out of date
+    @st.fragment
+    def _color_controls():
         # Load from saved palettes
         st.subheader("Saved Palettes")
+        saved_palettes = load_json("palettes.json", default={"palettes": []})
         if saved_palettes["palettes"]:
             pal_names = [p["name"] for p in saved_palettes["palettes"]]
             sel_pal = st.selectbox("Load a palette", pal_names,
                                    key="photo_load_pal")
-            if st.button("Load Palette"):
+            # Callbacks run before the fragment redraws, so the swatches
+            # below already show the new state without another rerun
+            def _load_palette():
                 pal_data = next(p for p in saved_palettes["palettes"]
                                 if p["name"] == sel_pal)
                 st.session_state.photo_palette = [
                     {"hex": c["hex"], "name": c.get("name", c["hex"])}
                     for c in pal_data["colors"]
                 ]
-                st.rerun()
+
+            st.button("Load Palette", on_click=_load_palette)
         else:
             st.caption("No saved palettes yet. Build one in Palette Builder.")
 
@@ -210,7 +319,103 @@ if base_img is not None:
             fill_color = custom_color
 
         st.markdown("---")
-        opacity = st.slider("Opacity", 0, 255, 120, key="photo_opacity")
+        st.slider("Opacity", 0, 255, 120, key="photo_opacity")
+
+        previous = st.session_state.get("photo_fill_color")
+        st.session_state.photo_fill_color = fill_color
+        shown = st.session_state.get("photo_shown_run") == st.session_state.photo_run_id
+        if fill_color != previous and shown and _preview_active():
+            st.rerun()
+
+    @st.fragment
+    def _polygon_sets():
+        st.subheader("Save / Load Polygons")
+        saved_polys = load_json("saved_polygons.json", default={"sets": {}})
+        n_pts = len(st.session_state.photo_points)
+        n_pending = len(st.session_state.photo_pending)
+        poly_set_name = st.text_input("Polygon set name", key="poly_set_name")
+        if st.button("Save Polygons", disabled=(n_pending == 0 and n_pts < 3)):
+            if poly_set_name:
+                # Include current in-progress points as a polygon if 3+
+                polys_to_save = [
+                    [list(p) for p in poly]
+                    for poly in st.session_state.photo_pending
+                ]
+                if n_pts >= 3:
+                    polys_to_save.append(
+                        [list(p) for p in st.session_state.photo_points]
+                    )
+                saved_polys["sets"][poly_set_name] = polys_to_save
+                save_json("saved_polygons.json", saved_polys)
+                st.success(f"Saved polygon set '{poly_set_name}'!")
+            else:
+                st.warning("Enter a name for the polygon set.")
+        poly_set_names = list(saved_polys["sets"].keys())
+        if poly_set_names:
+            load_poly_sel = st.selectbox("Load polygon set", poly_set_names,
+                                         key="poly_load_sel")
+            if st.button("Load Polygons"):
+                loaded_polys = saved_polys["sets"][load_poly_sel]
+                st.session_state.photo_pending = [
+                    [tuple(p) for p in poly] for poly in loaded_polys
+                ]
+                st.session_state.photo_points = []
+                st.rerun()
+            # Re-read the file: other sessions may have saved since this
+            # run rendered, and the callback fires before the next run
+            def _delete_set():
+                current = load_json("saved_polygons.json", default={"sets": {}})
+                if current["sets"].pop(load_poly_sel, None) is not None:
+                    save_json("saved_polygons.json", current)
+
+            st.button("Delete Polygon Set", on_click=_delete_set)
+        else:
+            st.caption("No saved polygon sets yet.")
+
+    @st.fragment
+    def _saved_work():
+        st.subheader("Save / Load Work")
+        saved_work = load_json("photo_work.json", default={"sessions": {}})
+        session_name = st.text_input("Session name", key="photo_session_name")
+        if st.button("Save Current Work"):
+            if session_name:
+                # Save current work (including image)
+                img_buf = io.BytesIO()
+                st.session_state.photo_base_img.save(img_buf, format="PNG")
+                img_b64 = base64.b64encode(img_buf.getvalue()).decode("ascii")
+                saved_work["sessions"][session_name] = {
+                    "fills": st.session_state.photo_fills,
+                    "pending": [
+                        [list(p) for p in poly]
+                        for poly in st.session_state.photo_pending
+                    ],
+                    "points": st.session_state.photo_points,
+                    "image_b64": img_b64,
+                }
+                save_json("photo_work.json", saved_work)
+                st.success(f"Saved '{session_name}'!")
+            else:
+                st.warning("Enter a name for the session.")
+
+        session_names = list(saved_work["sessions"].keys())
+        if session_names:
+            load_sel = st.selectbox("Load session", session_names,
+                                    key="photo_load_session")
+            if st.button("Load Session"):
+                _load_work(saved_work["sessions"][load_sel])
+                st.rerun()
+            def _delete_session():
+                current = load_json("photo_work.json", default={"sessions": {}})
+                if current["sessions"].pop(load_sel, None) is not None:
+                    save_json("photo_work.json", current)
+
+            st.button("Delete Session", on_click=_delete_session)
+        else:
+            st.caption("No saved sessions yet.")
+
+    # Sidebar controls
+    with st.sidebar:
+        _color_controls()
 
         st.markdown("---")
         st.subheader("Tool")
@@ -261,69 +466,17 @@ if base_img is not None:
 
         # Save / Load polygon sets
         st.markdown("---")
-        st.subheader("Save / Load Polygons")
-        saved_polys = load_json("saved_polygons.json", default={"sets": {}})
-        poly_set_name = st.text_input("Polygon set name", key="poly_set_name")
-        save_poly_btn = st.button("Save Polygons",
-                                   disabled=(n_pending == 0 and n_pts < 3))
-        poly_set_names = list(saved_polys["sets"].keys())
-        if poly_set_names:
-            load_poly_sel = st.selectbox("Load polygon set", poly_set_names,
-                                          key="poly_load_sel")
-            load_poly_btn = st.button("Load Polygons")
-            delete_poly_btn = st.button("Delete Polygon Set")
-        else:
-            st.caption("No saved polygon sets yet.")
-            load_poly_btn = False
-            delete_poly_btn = False
+        _polygon_sets()
 
         # Save / Load work
         st.markdown("---")
-        st.subheader("Save / Load Work")
-        session_name = st.text_input("Session name", key="photo_session_name")
-        save_work_btn = st.button("Save Current Work")
-
-        session_names = list(saved_work["sessions"].keys())
-        if session_names:
-            load_sel = st.selectbox("Load session", session_names,
-                                    key="photo_load_session")
-            load_work_btn = st.button("Load Session")
-            delete_work_btn = st.button("Delete Session")
-        else:
-            st.caption("No saved sessions yet.")
-            load_work_btn = False
-            delete_work_btn = False
+        _saved_work()
 
-    composited = _composite(base_img)
-    display_img = _draw_guides(composited)
-    display_rgb = display_img.convert("RGB")
-
-    # Clickable image
-    if tool == "Color Replace":
-        st.info(
-            "Click on the image to sample a color. Adjust tolerance to "
-            "expand/shrink the match area, then click 'Apply Color Replace'."
-        )
-    else:
-        st.info(
-            "Click to place vertices. 'Close Polygon' to finish a shape "
-            "(shown in yellow). Draw more polygons, then 'Fill All Polygons' "
-            "to apply the color."
-        )
-    coords = streamlit_image_coordinates(display_rgb, key="photo_click")
+    fill_color = st.session_state.get("photo_fill_color")
+    opacity = st.session_state.get("photo_opacity", 120)
 
-    # Handle new click — only process if it's genuinely new
-    if coords is not None:
-        click_key = (coords["x"], coords["y"])
-        if click_key != st.session_state.photo_last_click:
-            st.session_state.photo_last_click = click_key
-            if tool == "Color Replace":
-                # Sample pixel color from composited image (current appearance)
-                px = composited.getpixel((coords["x"], coords["y"]))
-                st.session_state.photo_sampled_color = (px[0], px[1], px[2])
-            else:
-                st.session_state.photo_points.append(list(click_key))
-            st.rerun()
+    # Button handlers run before the image is rendered: each one reruns the
+    # script, so drawing the stale frame first would be wasted work
 
     # Apply Color Replace
     if tool == "Color Replace":
@@ -382,83 +535,24 @@ if base_img is not None:
             st.session_state.photo_pending.append(last_fill["pts"])
         st.rerun()
 
-    # Save polygon set
-    if save_poly_btn and poly_set_name:
-        # Include current in-progress points as a polygon if 3+
-        polys_to_save = [
-            [list(p) for p in poly]
-            for poly in st.session_state.photo_pending
-        ]
-        if len(st.session_state.photo_points) >= 3:
-            polys_to_save.append(
-                [list(p) for p in st.session_state.photo_points]
-            )
-        saved_polys["sets"][poly_set_name] = polys_to_save
-        save_json("saved_polygons.json", saved_polys)
-        st.success(f"Saved polygon set '{poly_set_name}'!")
-    elif save_poly_btn and not poly_set_name:
-        st.warning("Enter a name for the polygon set.")
-
-    # Load polygon set
-    if load_poly_btn:
-        loaded_polys = saved_polys["sets"][load_poly_sel]
-        st.session_state.photo_pending = [
-            [tuple(p) for p in poly] for poly in loaded_polys
-        ]
-        st.session_state.photo_points = []
-        st.rerun()
-
-    # Delete polygon set
-    if delete_poly_btn:
-        del saved_polys["sets"][load_poly_sel]
-        save_json("saved_polygons.json", saved_polys)
-        st.rerun()
-
-    # Save current work (including image)
-    if save_work_btn and session_name:
-        img_buf = io.BytesIO()
-        base_img.save(img_buf, format="PNG")
-        img_b64 = base64.b64encode(img_buf.getvalue()).decode("ascii")
-        saved_work["sessions"][session_name] = {
-            "fills": st.session_state.photo_fills,
-            "pending": [
-                [list(p) for p in poly]
-                for poly in st.session_state.photo_pending
-            ],
-            "points": st.session_state.photo_points,
-            "image_b64": img_b64,
-        }
-        save_json("photo_work.json", saved_work)
-        st.success(f"Saved '{session_name}'!")
-    elif save_work_btn and not session_name:
-        st.warning("Enter a name for the session.")
-
-    # Load saved work
-    if load_work_btn:
-        data = saved_work["sessions"][load_sel]
-        if "image_b64" in data:
-            img_bytes = base64.b64decode(data["image_b64"])
-            st.session_state.photo_base_img = Image.open(
-                io.BytesIO(img_bytes)).convert("RGBA")
-        st.session_state.photo_fills = data.get("fills", [])
-        st.session_state.photo_pending = [
-            [tuple(p) for p in poly]
-            for poly in data.get("pending", [])
-        ]
-        st.session_state.photo_points = data.get("points", [])
-        st.session_state.photo_last_click = None
-        st.rerun()
-
-    # Delete saved session
-    if delete_work_btn:
-        del saved_work["sessions"][load_sel]
-        save_json("photo_work.json", saved_work)
-        st.rerun()
+    # Clickable image
+    if tool == "Color Replace":
+        st.info(
+            "Click on the image to sample a color. Adjust tolerance to "
+            "expand/shrink the match area, then click 'Apply Color Replace'."
+        )
+    else:
+        st.info(
+            "Click to place vertices. 'Close Polygon' to finish a shape "
+            "(shown in yellow). Draw more polygons, then 'Fill All Polygons' "
+            "to apply the color."
+        )
+    streamlit_image_coordinates(_EncodedPNG(_display_png(fill_color)),
+                                key="photo_click", on_click=_on_image_click)
+    st.session_state.photo_shown_run = st.session_state.photo_run_id
 
     # Download composited result
-    final = _composite(base_img).convert("RGB")
-    buf = io.BytesIO()
-    final.save(buf, format="PNG")
-    st.download_button("Download PNG", buf.getvalue(), "house_colored.png", "image/png")
+    st.download_button("Download PNG", _download_png(), "house_colored.png", "image/png",
+                       on_click="ignore")
 else:
     st.info("Upload a photo of your house to get started, or load a saved session above.")
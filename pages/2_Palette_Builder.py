@@ -1,13 +1,16 @@
 import streamlit as st
-from lib.paint_db import load_all_brands, search_by_name, find_closest
-from lib.color_utils import hex_to_rgb, rgb_to_hex, complementary, triadic, color_swatch_html
+from lib.paint_db import (load_catalog, brand_range, brand_colors, search_rows,
+                          search_by_name, find_closest)
+from lib.color_utils import color_swatch_html
+from lib.harmony import HARMONY_KINDS, suggest
 from lib.persistence import load_json, save_json
+from lib.house_raster import thumbnails, palette_scheme
 
 st.set_page_config(page_title="Palette Builder", page_icon="\U0001f308", layout="wide")
 st.title("\U0001f308 Palette Builder")
 
 # --- Load data ---
-brands = load_all_brands()
+catalog = load_catalog()
 palettes: dict = load_json("palettes.json", default={"palettes": []})
 
 # ── Sidebar: saved palettes ──
@@ -24,20 +27,49 @@ for i, pal in enumerate(palettes["palettes"]):
             save_json("palettes.json", palettes)
             st.rerun()
 
+# ── Palette gallery: house previews of every saved palette ──
+if palettes["palettes"]:
+    with st.expander(f"Palette Gallery ({len(palettes['palettes'])})"):
+        schemes = [palette_scheme([c["hex"] for c in pal["colors"]])
+                   for pal in palettes["palettes"]]
+        st.image(thumbnails(schemes),
+                 caption=[pal["name"] for pal in palettes["palettes"]])
+
 # ── Browse brand colors ──
 st.subheader("Browse Brand Colors")
-brand_names = [b["brand"] for b in brands]
+brand_names = catalog["brands"]
 selected_brand = st.selectbox("Select brand", brand_names)
-brand_data = next(b for b in brands if b["brand"] == selected_brand)
 
 search_q = st.text_input("Filter by name")
-colors_list = brand_data["colors"]
+brand_start, brand_stop = brand_range(selected_brand, catalog)
+if search_q:
+    match_rows = search_rows(search_q, catalog, brand_start, brand_stop)
+    total = len(match_rows)
+else:
+    total = brand_stop - brand_start
+
+# Only one page of the brand is decoded and drawn per run
+PAGE_SIZE = 100
+n_pages = max(1, -(-total // PAGE_SIZE))
+page = 1
+if n_pages > 1:
+    page = st.number_input(f"Page (of {n_pages})", 1, n_pages, 1)
+first = (page - 1) * PAGE_SIZE
+last = min(first + PAGE_SIZE, total)
 if search_q:
-    colors_list = [c for c in colors_list if search_q.lower() in c["name"].lower()]
+    rows = [int(r) for r in match_rows[first:last]]
+    colors_list = [catalog["colors"][r] for r in rows]
+else:
+    rows = range(brand_start + first, brand_start + last)
+    colors_list = brand_colors(selected_brand, catalog, first, last)
+if total > PAGE_SIZE:
+    st.caption(f"Showing {first + 1}–{last} of {total:,} colors")
+elif search_q and not total:
+    st.info("No matches found.")
 
 # Display as a grid
 cols = st.columns(5)
-for idx, color in enumerate(colors_list):
+for idx, (row, color) in enumerate(zip(rows, colors_list)):
     with cols[idx % 5]:
         st.markdown(
             f'{color_swatch_html(color["hex"], 40)}<br>'
@@ -46,7 +78,7 @@ for idx, color in enumerate(colors_list):
             unsafe_allow_html=True,
         )
         cur_len = len(st.session_state.get("current_palette", []))
-        if st.button("Add", key=f"add_{selected_brand}_{idx}",
+        if st.button("Add", key=f"add_{selected_brand}_{row}",
                       disabled=(cur_len >= 20)):
             if "current_palette" not in st.session_state:
                 st.session_state.current_palette = []
@@ -60,9 +92,9 @@ for idx, color in enumerate(colors_list):
 st.subheader("Search All Brands")
 global_q = st.text_input("Search by color name", key="global_search")
 if global_q:
-    results = search_by_name(global_q, brands)
+    results = search_by_name(global_q, catalog, limit=20)
     if results:
-        for r in results[:20]:
+        for r in results:
             st.markdown(
                 f'{color_swatch_html(r["hex"])} **{r["name"]}** — {r["brand"]} ({r["hex"]})',
                 unsafe_allow_html=True,
@@ -74,7 +106,7 @@ if global_q:
 st.subheader("Match a Custom Color")
 picked = st.color_picker("Pick a color", "#7a9e7e")
 if picked:
-    matches = find_closest(picked, n=8, brands=brands)
+    matches = find_closest(picked, n=8, catalog=catalog)
     st.write(f"Closest paints to `{picked}`:")
     for m in matches:
         st.markdown(
@@ -128,20 +160,28 @@ else:
                     st.session_state.current_palette = current
                     st.rerun()
 
-    # Color suggestions
-    if current:
-        st.markdown("**Suggestions based on your first color:**")
-        base = current[0]["hex"]
-        comp = complementary(base)
-        tri = triadic(base)
-        suggestions = [("Complementary", comp)] + [(f"Triadic {j+1}", t) for j, t in enumerate(tri)]
-        scols = st.columns(len(suggestions))
-        for j, (label, shex) in enumerate(suggestions):
+    st.image(thumbnails([palette_scheme([c["hex"] for c in current])])[0],
+             caption="House preview (colors assigned to body, roof, trim, "
+                     "door, windows, garage, shutters in order)")
+
+    # Color suggestions — every palette color, snapped to real paints
+    st.markdown("**Suggestions for your palette:**")
+    kind = st.selectbox("Harmony", HARMONY_KINDS, key="harmony_kind")
+    for c, row in zip(current, suggest([c["hex"] for c in current], kind, catalog)):
+        st.markdown(
+            f'{color_swatch_html(c["hex"], 25)} **{c["name"]}**',
+            unsafe_allow_html=True,
+        )
+        scols = st.columns(len(row))
+        for j, sug in enumerate(row):
             with scols[j]:
-                st.markdown(
-                    f'{color_swatch_html(shex, 35)}<br>{label}<br>`{shex}`',
-                    unsafe_allow_html=True,
-                )
+                lines = [f'{color_swatch_html(sug["hex"], 35)} `{sug["hex"]}`']
+                for m in sug["matches"]:
+                    lines.append(
+                        f'{color_swatch_html(m["hex"], 18)}{m["name"]} — '
+                        f'{m["brand"]} (distance {m["distance"]})'
+                    )
+                st.markdown("<br>".join(lines), unsafe_allow_html=True)
 
     # Save palette
     st.markdown("---")
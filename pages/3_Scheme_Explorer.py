@@ -0,0 +1,45 @@
+import streamlit as st
+from lib.persistence import load_json
+from lib.color_utils import color_swatch_html
+from lib.house_svg import SECTIONS
+from lib.house_raster import thumbnails
+from lib.scheme_explorer import explore
+
+st.set_page_config(page_title="Scheme Explorer", page_icon="\U0001f3e1", layout="wide")
+st.title("\U0001f3e1 Scheme Explorer")
+
+palettes = load_json("palettes.json", default={"palettes": []})
+
+if not palettes["palettes"]:
+    st.info("No saved palettes yet. Build one in Palette Builder.")
+    st.stop()
+
+pal_names = [p["name"] for p in palettes["palettes"]]
+sel_pal = st.selectbox("Palette", pal_names, key="scheme_palette")
+top_n = st.slider("Schemes to show", 3, 30, 12, key="scheme_top_n")
+
+pal_data = next(p for p in palettes["palettes"] if p["name"] == sel_pal)
+hex_list = [c["hex"] for c in pal_data["colors"]]
+names = {c["hex"]: c["name"] for c in pal_data["colors"]}
+
+results = explore(hex_list, top_n=top_n)
+if results and not results[0]["exact"]:
+    st.caption("Search space was too large to check exhaustively; showing "
+               "the best schemes found.")
+
+PER_ROW = 3
+previews = thumbnails([r["scheme"] for r in results], width=240)
+for row_start in range(0, len(results), PER_ROW):
+    cols = st.columns(PER_ROW)
+    for j, r in enumerate(results[row_start:row_start + PER_ROW]):
+        with cols[j]:
+            st.image(previews[row_start + j],
+                     caption=f"#{row_start + j + 1} — score {r['score']}")
+            st.markdown(
+                "<br>".join(
+                    f'{color_swatch_html(r["scheme"][s], 16)}{s.title()}: '
+                    f'{names[r["scheme"][s]]}'
+                    for s in SECTIONS
+                ),
+                unsafe_allow_html=True,
+            )